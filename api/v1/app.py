@@ -8,6 +8,7 @@ from models import storage
 from api.v1.views import app_views
 from os import getenv
 from flasgger import Swagger
+from werkzeug.serving import WSGIRequestHandler
 
 # Initialize the Flask application
 app = Flask(__name__)
@@ -38,6 +39,24 @@ app.config['SWAGGER'] = {
 swagger = Swagger(app)
 
 
+@app.before_request
+def begin_batch():
+    """
+    Picks up the changes other processes made to the storage, then groups
+    the saves made while serving a request into one storage flush.
+    """
+    storage.refresh()
+    storage.begin_batch()
+
+
+@app.teardown_request
+def end_batch(exception):
+    """
+    Flushes the saves grouped while serving the request.
+    """
+    storage.end_batch()
+
+
 @app.teardown_appcontext
 def teardown_session(exception):
     """
@@ -62,5 +81,7 @@ if __name__ == '__main__':
     # Set default values for the host and port if not specified
     host = '0.0.0.0' if not HBNB_API_HOST else HBNB_API_HOST
     port = 5000 if not HBNB_API_PORT else HBNB_API_PORT
+    # Speak HTTP/1.1 so streamed responses use chunked transfer encoding
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
     # Run the Flask application
     app.run(host=host, port=port, threaded=True)
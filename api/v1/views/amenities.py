@@ -1,16 +1,20 @@
 #!/usr/bin/python3
 """ Manages Amenity objects through API endpoints """
 from api.v1.views import app_views
+from api.v1.views.batch import create_batch, update_batch
+from api.v1.views.cache import cached
+from api.v1.views.conditional import conditional_object
+from api.v1.views.pagination import paginate
 from flask import jsonify, abort, make_response, request
 from models import storage
 from models.amenity import Amenity
 
 
 @app_views.route('/amenities', methods=['GET'], strict_slashes=False)
+@cached("Amenity")
 def get_all_amenities():
     """Fetches all Amenity objects from the storage"""
-    all_amenities = storage.all(Amenity)
-    return jsonify([amenity.to_dict() for amenity in all_amenities.values()])
+    return paginate(Amenity)
 
 
 @app_views.route('/amenities/<amenity_id>', methods=['GET'],
@@ -20,7 +24,7 @@ def get_amenity_by_id(amenity_id):
     amenity = storage.get("Amenity", amenity_id)
     if not amenity:
         abort(404, description="Amenity not found")
-    return jsonify(amenity.to_dict())
+    return conditional_object(amenity)
 
 
 @app_views.route('/amenities/<amenity_id>', methods=['DELETE'],
@@ -66,5 +70,18 @@ def update_amenity(amenity_id):
         if key not in ['id', 'created_at', 'updated_at']:
             setattr(amenity, key, value)
 
-    storage.save()
+    amenity.save()
     return make_response(jsonify(amenity.to_dict()), 200)
+
+
+@app_views.route('/amenities/batch', methods=['POST'],
+                 strict_slashes=False)
+def create_amenities():
+    """Creates the Amenity objects of a JSON array at once"""
+    return create_batch(Amenity, required=("name",))
+
+
+@app_views.route('/amenities/batch', methods=['PUT'], strict_slashes=False)
+def update_amenities():
+    """Updates the Amenity objects of a JSON array at once"""
+    return update_batch(Amenity)
@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""Batch creation and update shared by the collection views"""
+from flask import abort, jsonify, request
+from models import storage
+import hashlib
+
+# Largest number of objects a single batch request may carry
+MAX_BATCH_SIZE = 10000
+
+
+def batch_body():
+    """Returns the JSON array of objects sent with the request, aborting
+    with 400 when the body is something else or holds too many"""
+    body = request.get_json(silent=True)
+    if type(body) != list or \
+            not all(type(item) == dict for item in body):
+        abort(400, description="Not a JSON array of objects")
+    if len(body) > MAX_BATCH_SIZE:
+        abort(400, description="More than {} objects".format(
+            MAX_BATCH_SIZE))
+    return body
+
+
+def create_batch(cls, required=(), check=None,
+                 ignored=("id", "created_at", "updated_at"), **parent):
+    """
+    Creates an object of cls from every dictionary of the JSON array sent
+    with the request, leaving out the keys in ignored and setting the
+    attributes parent on each, and saves them all at once. Every
+    dictionary must hold the keys required, and is passed to check, if
+    given, which may change it or abort. Nothing is created unless all of
+    them pass. Answers the array of the new objects with 201.
+    """
+    items = batch_body()
+    for item in items:
+        for key in ignored:
+            item.pop(key, None)
+        for key in required:
+            if not item.get(key):
+                abort(400, description="Missing {}".format(key))
+        if check is not None:
+            check(item)
+        item.update(parent)
+    objs = storage.bulk_new([cls(**item) for item in items])
+    return jsonify([obj.to_dict() for obj in objs]), 201
+
+
+def update_batch(cls, ignored=("id", "created_at", "updated_at")):
+    """
+    Applies every dictionary of the JSON array sent with the request to
+    the object of cls whose id it holds, leaving out the keys in ignored,
+    and saves them all at once. Dictionaries naming no stored object are
+    skipped. Answers the array of the updated objects.
+    """
+    updates = []
+    for item in batch_body():
+        if "id" not in item:
+            abort(400, description="Missing id")
+        updates.append((item["id"], {key: value for key, value
+                                     in item.items() if key not in ignored}))
+    objs = storage.bulk_update(cls, updates)
+    return jsonify([obj.to_dict() for obj in objs]), 200
+
+
+def references(cls, key):
+    """Returns a check for create_batch() aborting with 404 unless the
+    value of key names a stored object of cls"""
+    known = set()
+
+    def check(item):
+        """Looks the referenced object up once per distinct id"""
+        if item[key] not in known:
+            if storage.get(cls, item[key]) is None:
+                abort(404)
+            known.add(item[key])
+    return check
+
+
+def hash_password(item):
+    """Check for create_batch() hashing the password of item as the
+    single creation view does"""
+    item["password"] = hashlib.sha256(item["password"].encode()).hexdigest()
@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+"""Response cache for the read views, invalidated by storage changes"""
+from collections import OrderedDict
+from flask import Response, make_response, request
+from functools import wraps
+from models import storage
+from os import getenv
+import threading
+import time
+
+# Bodies larger than this many bytes are served but never cached
+MAX_BODY_SIZE = 1 << 20
+# Number of cached keys tracked by tags past which the cache is flushed
+MAX_TRACKED_KEYS = 16384
+# Headers that are recomputed when a cached body is served again
+SKIPPED_HEADERS = ("Content-Length", "Transfer-Encoding")
+
+
+class LRUCache:
+    """
+    In-process least recently used store with an entry limit and a time
+    to live. Any object with the same get/set/delete/clear methods can be
+    plugged in as the backend of the response cache instead.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60):
+        """Creates an empty cache"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the live value stored under key, or None"""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        """Stores value under key, evicting the least recently used"""
+        with self.__lock:
+            self.__entries[key] = (time.monotonic() + self.ttl, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def delete(self, key):
+        """Drops the value stored under key"""
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self):
+        """Drops every value"""
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self):
+        """Returns the number of values stored, expired ones included"""
+        return len(self.__entries)
+
+
+class ResponseCache:
+    """
+    Keeps rendered responses in a backend together with the tags they
+    depend on. A tag is ("Class",) for every object of a class, or
+    ("Class", attr, value) for the objects whose attr equals value.
+    """
+
+    def __init__(self, backend):
+        """Creates a response cache on top of backend"""
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # int - increased by every storage change, see store()
+        self.generation = 0
+        self.__keys = {}
+        self.__attrs = {}
+        self.__tracked = set()
+        self.__lock = threading.Lock()
+
+    def lookup(self, key):
+        """Returns the entry cached under key, or None"""
+        entry = self.backend.get(key)
+        with self.__lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def store(self, key, entry, tags, generation):
+        """Caches entry under key unless storage changed since generation,
+        in which case entry may already be stale"""
+        with self.__lock:
+            if generation != self.generation:
+                return
+            if len(self.__tracked) >= MAX_TRACKED_KEYS:
+                # entries evicted by the backend leave their keys behind
+                self.__keys.clear()
+                self.__tracked.clear()
+                self.backend.clear()
+            self.__tracked.add(key)
+            for tag in tags:
+                self.__keys.setdefault(tag, set()).add(key)
+                if len(tag) == 3:
+                    self.__attrs.setdefault(tag[0], set()).add(tag[1])
+        self.backend.set(key, entry)
+
+    def invalidate(self, obj, attr=None, old=None):
+        """Storage listener dropping the entries that depend on obj"""
+        name = obj.__class__.__name__
+        tags = [(name,), (name, "id", obj.id)]
+        with self.__lock:
+            self.generation += 1
+            for parent in self.__attrs.get(name, ()):
+                tags.append((name, parent, getattr(obj, parent, None)))
+            if attr is not None and attr in self.__attrs.get(name, ()):
+                tags.append((name, attr, old))
+            keys = set()
+            for tag in tags:
+                keys.update(self.__keys.pop(tag, ()))
+            self.__tracked.difference_update(keys)
+            self.invalidations += len(keys)
+        for key in keys:
+            self.backend.delete(key)
+
+    def stats(self):
+        """Returns the hit, miss and invalidation counters"""
+        with self.__lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "invalidations": self.invalidations,
+                    "entries": len(self.backend)}
+
+
+response_cache = ResponseCache(LRUCache(int(getenv("HBNB_CACHE_SIZE", 1024)),
+                                        float(getenv("HBNB_CACHE_TTL", 60))))
+storage.subscribe(response_cache.invalidate)
+
+
+def parse_tag(tag):
+    """Turns "Class" or "Class:attr=value" into a cache tag"""
+    name, _, condition = tag.partition(":")
+    if not condition:
+        return (name,)
+    attr, _, value = condition.partition("=")
+    return (name, attr, value)
+
+
+def cached(*tags):
+    """
+    Caches the 200 responses of a view under the request path and query
+    string. tags ("Class" or "Class:attr={view_arg}") are formatted with
+    the view arguments and name the objects the response depends on.
+    """
+    def decorator(view):
+        """Wraps view with the response cache"""
+        @wraps(view)
+        def wrapper(**kwargs):
+            """Serves the cached response or renders and caches it"""
+            key = request.full_path
+            entry = response_cache.lookup(key)
+            if entry is not None:
+                headers, body = entry
+                response = Response(body, 200, headers)
+                return response.make_conditional(request)
+            generation = response_cache.generation
+            response = make_response(view(**kwargs))
+            if response.status_code != 200:
+                return response
+            entry_tags = [parse_tag(tag.format(**kwargs)) for tag in tags]
+            headers = [(name, value) for name, value in response.headers
+                       if name not in SKIPPED_HEADERS]
+
+            def remember(body):
+                """Caches the rendered body"""
+                if len(body) <= MAX_BODY_SIZE:
+                    response_cache.store(key, (headers, body),
+                                         entry_tags, generation)
+            if response.is_streamed:
+                response.response = tee(response.response, remember)
+            else:
+                remember(response.get_data())
+            return response
+        return wrapper
+    return decorator
+
+
+def tee(chunks, callback):
+    """Yields chunks and passes their concatenation to callback once all
+    of them went out, unless the body grows past MAX_BODY_SIZE"""
+    parts = []
+    size = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        if size <= MAX_BODY_SIZE:
+            parts.append(chunk)
+            size += len(chunk)
+        yield chunk
+    if size <= MAX_BODY_SIZE:
+        callback(b"".join(parts))
@@ -1,6 +1,10 @@
 #!/usr/bin/python3
 """ Manages City objects through API endpoints """
 from api.v1.views import app_views
+from api.v1.views.batch import create_batch, update_batch
+from api.v1.views.cache import cached
+from api.v1.views.conditional import conditional_object
+from api.v1.views.pagination import paginate
 from flask import jsonify, abort, make_response, request
 from models import storage
 from models.state import State
@@ -9,12 +13,13 @@ from models.city import City
 
 @app_views.route('/states/<state_id>/cities', methods=['GET'],
                  strict_slashes=False)
+@cached("City:state_id={state_id}", "State:id={state_id}")
 def get_cities_for_state(state_id):
     """Fetches all City objects associated with a specific State"""
     state = storage.get("State", state_id)
     if not state:
         abort(404, description="State not found")
-    return jsonify([city.to_dict() for city in state.cities])
+    return paginate(City, state_id=state.id)
 
 
 @app_views.route('/cities/<city_id>', methods=['GET'], strict_slashes=False)
@@ -23,7 +28,7 @@ def get_city_by_id(city_id):
     city = storage.get("City", city_id)
     if not city:
         abort(404, description="City not found")
-    return jsonify(city.to_dict())
+    return conditional_object(city)
 
 
 @app_views.route('/cities/<city_id>', methods=['DELETE'], strict_slashes=False)
@@ -72,5 +77,22 @@ def update_city(city_id):
         if key not in ['id', 'state_id', 'created_at', 'updated_at']:
             setattr(city, key, value)
 
-    storage.save()
+    city.save()
     return make_response(jsonify(city.to_dict()), 200)
+
+
+@app_views.route('/states/<state_id>/cities/batch', methods=['POST'],
+                 strict_slashes=False)
+def create_cities_for_state(state_id):
+    """Creates the City objects of a JSON array in a specific State"""
+    state = storage.get("State", state_id)
+    if not state:
+        abort(404, description="State not found")
+    return create_batch(City, required=("name",), state_id=state.id)
+
+
+@app_views.route('/cities/batch', methods=['PUT'], strict_slashes=False)
+def update_cities():
+    """Updates the City objects of a JSON array at once"""
+    return update_batch(City, ignored=('id', 'state_id', 'created_at',
+                                       'updated_at'))
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""ETags and conditional GET handling shared by the views"""
+from flask import Response, make_response, request
+from hashlib import sha1
+from models import storage, storage_t
+import uuid
+
+# Changes whenever the process restarts, since the file storage change
+# counters used for collection ETags start over from zero
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+def not_modified(etag, last_modified):
+    """Returns a 304 response when the request validators show the
+    client copy is current, None otherwise"""
+    if request.if_none_match:
+        if not request.if_none_match.contains_weak(etag):
+            return None
+    elif request.if_modified_since is None or \
+            last_modified.replace(microsecond=0) > \
+            request.if_modified_since.replace(tzinfo=None):
+        return None
+    response = make_response("", 304)
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    return response
+
+
+def conditional_object(obj):
+    """Returns obj as a JSON response tagged with an ETag derived from its
+    id and updated_at, or 304 if the client already has it"""
+    stamp = "{}{}".format(obj.id, obj.updated_at.isoformat())
+    etag = sha1(stamp.encode()).hexdigest()
+    response = not_modified(etag, obj.updated_at)
+    if response is None:
+        response = Response(obj.to_json(), mimetype="application/json")
+        response.set_etag(etag, weak=True)
+        response.last_modified = obj.updated_at
+    return response
+
+
+def collection_validators(*classes):
+    """Returns the ETag and last modification time of a collection made
+    of objects of classes, from the storage stamps of the classes: the
+    change counters of this process in file storage mode, the row counts
+    and latest updates read from the database otherwise"""
+    stamps = [storage.stamp(cls) for cls in classes]
+    etag = "-".join("{}{}".format(cls.__name__, version)
+                    for cls, (version, last_modified) in zip(classes, stamps))
+    if storage_t != "db":
+        etag = "{}-{}".format(BOOT_ID, etag)
+    return etag, max(last_modified for version, last_modified in stamps)
+
+
+def tag_collection(response, etag, last_modified):
+    """Adds the collection validators to response and returns it"""
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    return response
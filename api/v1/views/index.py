@@ -4,8 +4,9 @@ This script defines the index for the application, including routes
 for status and statistics.
 """
 from api.v1.views import app_views
-from flask import jsonify
-from models import storage
+from api.v1.views.cache import cached, response_cache
+from flask import abort, jsonify
+from models import storage, storage_t
 
 
 @app_views.route('/status', methods=['GET'], strict_slashes=False)
@@ -17,6 +18,7 @@ def status():
 
 
 @app_views.route('/stats', methods=['GET'], strict_slashes=False)
+@cached("Amenity", "City", "Place", "Review", "State", "User")
 def stats():
     """
     Endpoint to retrieve the count of each instance type,
@@ -28,3 +30,24 @@ def stats():
                    reviews=storage.count("Review"),
                    states=storage.count("State"),
                    users=storage.count("User"))
+
+
+@app_views.route('/stats/cache', methods=['GET'], strict_slashes=False)
+def cache_stats():
+    """
+    Endpoint to retrieve the response cache hit, miss and invalidation
+    counters, returning a JSON response.
+    """
+    return jsonify(response_cache.stats())
+
+
+@app_views.route('/stats/pool', methods=['GET'], strict_slashes=False)
+def pool_stats():
+    """
+    Endpoint to retrieve the database connection pool gauges and the
+    checkout counters and waits, returning a JSON response. Only the
+    database storage has a pool.
+    """
+    if storage_t != "db":
+        abort(404)
+    return jsonify(storage.pool_stats())
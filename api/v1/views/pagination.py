@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""Keyset pagination shared by the collection views"""
+from api.v1.views.conditional import collection_validators, \
+    not_modified, tag_collection
+from api.v1.views.streaming import json_texts, stream_texts
+import base64
+from datetime import datetime
+from flask import abort, request
+import json
+from models import storage
+from urllib.parse import urlencode
+
+# Page size used when a request carries a cursor but no limit
+DEFAULT_LIMIT = 100
+
+
+def encode_cursor(obj):
+    """Returns the opaque cursor pointing just after obj, an object or
+    a snapshot Record"""
+    raw = json.dumps([obj.created_at.isoformat(), obj.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Returns the (created_at, id) pair encoded in cursor. Timestamps are
+    stored naive, so a cursor with a time zone is rejected like any other
+    malformed one."""
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor))
+        created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError):
+        abort(400, description="Invalid cursor")
+    if created_at.tzinfo is not None:
+        abort(400, description="Invalid cursor")
+    return created_at, str(id)
+
+
+def page_args():
+    """Returns the (limit, after) pair asked for by the limit and cursor
+    arguments of the request, or None when it carries neither"""
+    limit = request.args.get("limit")
+    cursor = request.args.get("cursor")
+    if limit is None and cursor is None:
+        return None
+    if limit is None:
+        limit = DEFAULT_LIMIT
+    elif not limit.isdecimal() or int(limit) == 0:
+        abort(400, description="Invalid limit")
+    return int(limit), None if cursor is None else decode_cursor(cursor)
+
+
+def link_next(response, last, limit):
+    """Adds to response the Link header of the page of limit objects
+    following last, an object or a snapshot Record"""
+    args = request.args.to_dict()
+    args["limit"] = limit
+    args["cursor"] = encode_cursor(last)
+    response.headers["Link"] = '<{}?{}>; rel="next"'.format(
+        request.base_url, urlencode(args))
+
+
+def paginate(cls, **filters):
+    """Lists the objects of cls matching filters as a JSON response.
+    When the request carries a limit or a cursor only one page is sent,
+    with a Link header pointing to the next one; otherwise the whole
+    collection is streamed, the snapshot closing once it is sent. Objects
+    are read from a storage snapshot, so writes made meanwhile neither
+    wait nor show. Unchanged collections get a 304 answer."""
+    etag, last_modified = collection_validators(cls)
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+    page = page_args()
+    if page is None:
+        snapshot = storage.snapshot(cls)
+        response = stream_texts(record.text for record
+                                in snapshot.stream(cls, **filters))
+        response.call_on_close(snapshot.close)
+        return tag_collection(response, etag, last_modified)
+
+    limit, after = page
+    with storage.snapshot(cls) as snapshot:
+        records = snapshot.records(cls, limit=limit + 1, after=after,
+                                   **filters)
+    response = json_texts(record.text for record in records[:limit])
+    if len(records) > limit:
+        link_next(response, records[limit - 1], limit)
+    return tag_collection(response, etag, last_modified)
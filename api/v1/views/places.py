@@ -3,23 +3,27 @@
 from flask import jsonify, abort, request
 from models import storage
 from api.v1.views import app_views
+from api.v1.views.batch import create_batch, references, update_batch
+from api.v1.views.cache import cached
+from api.v1.views.conditional import conditional_object
+from api.v1.views.pagination import link_next, page_args, paginate
+from api.v1.views.streaming import json_texts, stream_texts
 from models.city import City
 from models.place import Place
 from models.user import User
-from models.state import State
-from models.amenity import Amenity
 from flasgger.utils import swag_from
 
 
 @app_views.route("/cities/<city_id>/places", methods=["GET"],
                  strict_slashes=False)
 @swag_from('documentation/place/get_places.yml', methods=['GET'])
+@cached("Place:city_id={city_id}", "City:id={city_id}")
 def place_by_city(city_id):
     """View function that return place objects by city"""
     city = storage.get(City, city_id)
     if city is None:
         abort(404)
-    return jsonify([place.to_dict() for place in city.places])
+    return paginate(Place, city_id=city.id)
 
 
 @app_views.route("/places/<place_id>", methods=["GET"],
@@ -30,7 +34,7 @@ def show_place(place_id):
     place = storage.get(Place, place_id)
     if place is None:
         abort(404)
-    return jsonify(place.to_dict())
+    return conditional_object(place)
 
 
 @app_views.route("/places/<place_id>", methods=["DELETE"],
@@ -74,43 +78,35 @@ def insert_place(city_id):
                  strict_slashes=False)
 @swag_from('documentation/place/put_place.yml', methods=['PUT'])
 def places_search():
-    """Retrieves all Place objects depending of the body of the request"""
+    """Retrieves all Place objects depending of the body of the request,
+    one page at a time when the request carries a limit or a cursor and
+    else streamed, the snapshot closing once they are sent"""
     body = request.get_json()
     if type(body) != dict:
         abort(400, description="Not a JSON")
-    id_states = body.get("states", [])
-    id_cities = body.get("cities", [])
-    id_amenities = body.get("amenities", [])
-    places = []
-    if id_states == id_cities == []:
-        places = storage.all(Place).values()
-    else:
-        states = [
-            storage.get(State, _id) for _id in id_states
-            if storage.get(State, _id)
-        ]
-        cities = [city for state in states for city in state.cities]
-        cities += [
-            storage.get(City, _id) for _id in id_cities
-            if storage.get(City, _id)
-        ]
-        cities = list(set(cities))
-        places = [place for city in cities for place in city.places]
-
-    amenities = [
-        storage.get(Amenity, _id) for _id in id_amenities
-        if storage.get(Amenity, _id)
-    ]
-
-    res = []
-    for place in places:
-        res.append(place.to_dict())
-        for amenity in amenities:
-            if amenity not in place.amenities:
-                res.pop()
-                break
-
-    return jsonify(res)
+    page = page_args()
+    limit, after = (None, None) if page is None else page
+    snapshot = storage.snapshot(Place)
+    try:
+        ids = snapshot.search_places(states=body.get("states", []),
+                                     cities=body.get("cities", []),
+                                     amenities=body.get("amenities", []),
+                                     limit=None if limit is None
+                                     else limit + 1, after=after)
+    except BaseException:
+        snapshot.close()
+        raise
+    if page is None:
+        response = stream_texts(record.text for record
+                                in snapshot.stream_all(Place, ids))
+        response.call_on_close(snapshot.close)
+        return response
+    with snapshot:
+        records = snapshot.get_all(Place, ids[:limit])
+    response = json_texts(record.text for record in records)
+    if len(ids) > limit:
+        link_next(response, records[-1], limit)
+    return response
 
 
 @app_views.route("/places/<place_id>", methods=["PUT"],
@@ -127,5 +123,23 @@ def update_place(place_id):
     for key, value in res.items():
         if key not in ["id", "user_id", "city_id", "created_at", "updated_at"]:
             setattr(place, key, value)
-    storage.save()
+    place.save()
     return jsonify(place.to_dict()), 200
+
+
+@app_views.route("/cities/<city_id>/places/batch", methods=["POST"],
+                 strict_slashes=False)
+def insert_places(city_id):
+    """Endpoint that inserts the Place objects of a JSON array"""
+    city = storage.get(City, city_id)
+    if city is None:
+        abort(404)
+    return create_batch(Place, required=("user_id", "name"),
+                        check=references(User, "user_id"), city_id=city_id)
+
+
+@app_views.route("/places/batch", methods=["PUT"], strict_slashes=False)
+def update_places():
+    """Endpoint that updates the Place objects of a JSON array"""
+    return update_batch(Place, ignored=("id", "user_id", "city_id",
+                                        "created_at", "updated_at"))
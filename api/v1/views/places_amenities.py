@@ -17,7 +17,7 @@ mode = getenv("HBNB_TYPE_STORAGE")
            methods=['GET'])
 def amenities_from_place(place_id):
     """Get all amenities of a place object"""
-    place = storage.get(Place, place_id)
+    place = storage.get(Place, place_id, load=["amenities"])
     if place is None:
         abort(404)
     if mode == "db":
@@ -41,11 +41,13 @@ def delete_amenity_from_place(place_id, amenity_id):
     if mode == "db":
         if amenity not in place.amenities:
             abort(404)
+        place.amenities.remove(amenity)
     else:
-        if amenity.id not in place.amenity_id:
+        if amenity.id not in place.amenity_ids:
             abort(404)
-    amenity.delete()
-    storage.save()
+        place.amenity_ids = [_id for _id in place.amenity_ids
+                             if _id != amenity.id]
+    place.save()
 
     return jsonify({})
 
@@ -66,9 +68,9 @@ def insert_amenity_in_place(place_id, amenity_id):
         else:
             place.amenities.append(amenity)
     else:
-        if amenity.id in place.amenity_id:
+        if amenity.id in place.amenity_ids:
             return jsonify(amenity.to_dict())
         else:
-            place.amenity_id.append(amenity.id)
-    storage.save()
+            place.amenity_ids = place.amenity_ids + [amenity.id]
+    place.save()
     return jsonify(amenity.to_dict()), 201
@@ -3,6 +3,10 @@
 from flask import jsonify, abort, request
 from models import storage
 from api.v1.views import app_views
+from api.v1.views.batch import create_batch, references, update_batch
+from api.v1.views.cache import cached
+from api.v1.views.conditional import conditional_object
+from api.v1.views.pagination import paginate
 from models.review import Review
 from models.place import Place
 from models.user import User
@@ -12,12 +16,13 @@ from flasgger.utils import swag_from
 @app_views.route("/places/<place_id>/reviews", methods=["GET"],
                  strict_slashes=False)
 @swag_from('documentation/reviews/get_reviews.yml', methods=['GET'])
+@cached("Review:place_id={place_id}", "Place:id={place_id}")
 def review_by_place(place_id):
     """View function that return Review objects by Place"""
     place = storage.get(Place, place_id)
     if place is None:
         abort(404)
-    return jsonify([review.to_dict() for review in place.reviews])
+    return paginate(Review, place_id=place.id)
 
 
 @app_views.route("/reviews/<review_id>", methods=["GET"],
@@ -28,7 +33,7 @@ def show_review(review_id):
     review = storage.get(Review, review_id)
     if review is None:
         abort(404)
-    return jsonify(review.to_dict())
+    return conditional_object(review)
 
 
 @app_views.route("/reviews/<review_id>", methods=["DELETE"],
@@ -84,5 +89,23 @@ def update_review(review_id):
         if key not in ["id", "user_id", "place_id",
                        "created_at", "updated_at"]:
             setattr(review, key, value)
-    storage.save()
+    review.save()
     return jsonify(review.to_dict()), 200
+
+
+@app_views.route("/places/<place_id>/reviews/batch", methods=["POST"],
+                 strict_slashes=False)
+def insert_reviews(place_id):
+    """Endpoint that inserts the Review objects of a JSON array"""
+    place = storage.get(Place, place_id)
+    if place is None:
+        abort(404)
+    return create_batch(Review, required=("user_id", "text"),
+                        check=references(User, "user_id"), place_id=place_id)
+
+
+@app_views.route("/reviews/batch", methods=["PUT"], strict_slashes=False)
+def update_reviews():
+    """Endpoint that updates the Review objects of a JSON array"""
+    return update_batch(Review, ignored=("id", "user_id", "place_id",
+                                         "created_at", "updated_at"))
@@ -1,16 +1,20 @@
 #!/usr/bin/python3
 """ Handles CRUD operations for State objects via API """
 from api.v1.views import app_views
+from api.v1.views.batch import create_batch, update_batch
+from api.v1.views.cache import cached
+from api.v1.views.conditional import conditional_object
+from api.v1.views.pagination import paginate
 from flask import jsonify, abort, make_response, request
 from models import storage
 from models.state import State
 
 
 @app_views.route('/states', methods=['GET'], strict_slashes=False)
+@cached("State")
 def get_all_states():
     """Fetches all State objects from the storage"""
-    all_states = storage.all(State)
-    return jsonify([state.to_dict() for state in all_states.values()])
+    return paginate(State)
 
 
 @app_views.route('/states/<state_id>', methods=['GET'], strict_slashes=False)
@@ -19,7 +23,7 @@ def get_state_by_id(state_id):
     state = storage.get("State", state_id)
     if not state:
         abort(404, description="State not found")
-    return jsonify(state.to_dict())
+    return conditional_object(state)
 
 
 @app_views.route('/states/<state_id>', methods=['DELETE'],
@@ -64,5 +68,17 @@ def update_state(state_id):
         if key not in ["id", "created_at", "updated_at"]:
             setattr(state, key, value)
 
-    storage.save()
+    state.save()
     return make_response(jsonify(state.to_dict()), 200)
+
+
+@app_views.route('/states/batch', methods=['POST'], strict_slashes=False)
+def create_states():
+    """Creates the State objects of a JSON array at once"""
+    return create_batch(State, required=("name",))
+
+
+@app_views.route('/states/batch', methods=['PUT'], strict_slashes=False)
+def update_states():
+    """Updates the State objects of a JSON array at once"""
+    return update_batch(State)
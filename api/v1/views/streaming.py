@@ -0,0 +1,38 @@
+#!/usr/bin/python3
+"""Streams JSON arrays to the client as they are serialized"""
+from flask import Response, stream_with_context
+
+# Number of characters buffered before a chunk is sent to the client
+CHUNK_SIZE = 16384
+
+
+def stream_texts(texts):
+    """Returns a response streaming the JSON array whose elements are the
+    JSON texts produced by texts"""
+    def generate():
+        """Yields the array in chunks of about CHUNK_SIZE characters"""
+        chunk = []
+        size = 0
+        separator = "["
+        for text in texts:
+            chunk.append(separator)
+            chunk.append(text)
+            separator = ","
+            size += len(text) + 1
+            if size >= CHUNK_SIZE:
+                yield "".join(chunk)
+                chunk = []
+                size = 0
+        if separator == "[":
+            chunk.append("[")
+        chunk.append("]")
+        yield "".join(chunk)
+    return Response(stream_with_context(generate()),
+                    mimetype="application/json")
+
+
+def json_texts(texts):
+    """Returns a response holding the JSON array whose elements are the
+    JSON texts produced by texts"""
+    return Response("[" + ",".join(texts) + "]",
+                    mimetype="application/json")
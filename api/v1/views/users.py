@@ -1,6 +1,10 @@
 #!/usr/bin/python3
 """ Manages User objects through API endpoints """
 from api.v1.views import app_views
+from api.v1.views.batch import create_batch, hash_password, update_batch
+from api.v1.views.cache import cached
+from api.v1.views.conditional import conditional_object
+from api.v1.views.pagination import paginate
 from flask import jsonify, abort, make_response, request
 from models import storage
 from models.user import User
@@ -8,10 +12,10 @@ import hashlib
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
+@cached("User")
 def get_all_users():
     """Retrieves all User objects from the storage"""
-    all_users = storage.all(User)
-    return jsonify([user.to_dict() for user in all_users.values()])
+    return paginate(User)
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -20,7 +24,7 @@ def get_user_by_id(user_id):
     user = storage.get("User", user_id)
     if not user:
         abort(404, description="User not found")
-    return jsonify(user.to_dict())
+    return conditional_object(user)
 
 
 @app_views.route('/users/<user_id>', methods=['DELETE'], strict_slashes=False)
@@ -70,6 +74,19 @@ def update_user(user_id):
         if key not in ['id', 'email', 'created_at', 'updated_at']:
             setattr(user, key, value)
 
-    storage.save()
+    user.save()
     return make_response(jsonify(user.to_dict()), 200)
 
+
+@app_views.route('/users/batch', methods=['POST'], strict_slashes=False)
+def create_users():
+    """Creates the User objects of a JSON array at once"""
+    return create_batch(User, required=("email", "password"),
+                        check=hash_password)
+
+
+@app_views.route('/users/batch', methods=['PUT'], strict_slashes=False)
+def update_users():
+    """Updates the User objects of a JSON array at once"""
+    return update_batch(User, ignored=('id', 'email', 'created_at',
+                                       'updated_at'))
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""
+Measures creating Amenities one BaseModel.save() at a time against one
+storage.bulk_new() call, then updating them one save at a time against
+one storage.bulk_update() call. Runs in a temporary directory with the
+file storage, or against HBNB_DB_URL when HBNB_TYPE_STORAGE is db.
+
+usage: python3 -m benchmarks.bulk_insert [objects]
+"""
+import os
+import sys
+import tempfile
+import time
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    os.chdir(tempfile.mkdtemp())
+    import models
+    from models.amenity import Amenity
+
+    storage = models.storage
+    print("{} objects, {} storage".format(count, models.storage_t or "file"))
+    start = time.perf_counter()
+    single = [Amenity(name="single") for i in range(count)]
+    for amenity in single:
+        amenity.save()
+    created_single = time.perf_counter() - start
+    start = time.perf_counter()
+    bulk = storage.bulk_new([Amenity(name="bulk") for i in range(count)])
+    created_bulk = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for amenity in single:
+        amenity.name = "changed"
+        amenity.save()
+    updated_single = time.perf_counter() - start
+    start = time.perf_counter()
+    storage.bulk_update(Amenity, [(amenity.id, {"name": "changed"})
+                                  for amenity in bulk])
+    updated_bulk = time.perf_counter() - start
+    print("{:>7} {:>10} {:>10}".format("", "one each", "bulk"))
+    print("{:>7} {:>9.2f}s {:>9.2f}s".format("create", created_single,
+                                             created_bulk))
+    print("{:>7} {:>9.2f}s {:>9.2f}s".format("update", updated_single,
+                                             updated_bulk))
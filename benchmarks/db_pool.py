@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""
+Load tests the DBStorage connection pool: 32 threads each check out a
+connection, read a State and give the connection back, with pools of
+2, 8 and 32 connections. Runs against HBNB_DB_URL, by default a SQLite
+file in a temporary directory.
+
+usage: python3 -m benchmarks.db_pool [seconds]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+def run(storage, state_id, readers, seconds):
+    """Returns the reads per second made by readers threads"""
+    reads = [0] * readers
+    stop = time.monotonic() + seconds
+
+    def read(slot):
+        """Reads the state in a fresh session until the time is up"""
+        while time.monotonic() < stop:
+            storage.get("State", state_id)
+            storage.close()
+            reads[slot] += 1
+    threads = [threading.Thread(target=read, args=(i,))
+               for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / seconds
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    os.environ["HBNB_TYPE_STORAGE"] = "db"
+    os.environ.setdefault("HBNB_DB_URL", "sqlite:///{}".format(
+        os.path.join(tempfile.mkdtemp(), "hbnb.db")))
+    os.environ["HBNB_DB_POOL_OVERFLOW"] = "0"
+    import models
+    from models.engine.db_storage import DBStorage
+    from models.state import State
+
+    state = State(name="bench")
+    models.storage.new(state)
+    models.storage.save()
+    print(os.environ["HBNB_DB_URL"])
+    print("{:>5} {:>10} {:>10} {:>9}".format(
+        "pool", "reads", "mean wait", "timeouts"))
+    for size in (2, 8, 32):
+        os.environ["HBNB_DB_POOL_SIZE"] = str(size)
+        storage = DBStorage()
+        storage.reload()
+        before = storage.pool_stats()
+        rate = run(storage, state.id, 32, seconds)
+        after = storage.pool_stats()
+        checkouts = after["checkouts"] - before["checkouts"]
+        wait = after["wait_total"] - before["wait_total"]
+        print("{:>5} {:>8.0f}/s {:>8.2f}ms {:>9}".format(
+            size, rate, 1000 * wait / max(checkouts, 1),
+            after["timeouts"] - before["timeouts"]))
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""
+Measures FileStorage save throughput with 1, 8 and 32 threads creating
+and saving objects concurrently, with and without group commit.
+
+usage: python3 -m benchmarks.group_commit [objects in the file] [seconds]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+def run(storage, writers, seconds):
+    """Returns the saves per second made by writers threads, then
+    deletes what they created"""
+    from models.state import State
+
+    saves = [0] * writers
+    created = []
+    stop = time.monotonic() + seconds
+
+    def write(slot):
+        """Creates and saves States until the time is up"""
+        while time.monotonic() < stop:
+            state = State(name="bench")
+            created.append(state)
+            storage.new(state)
+            storage.save()
+            saves[slot] += 1
+    threads = [threading.Thread(target=write, args=(i,))
+               for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for state in created:
+        storage.delete(state)
+    storage.save()
+    return sum(saves) / seconds
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    os.environ.pop("HBNB_TYPE_STORAGE", None)
+    os.environ.setdefault("HBNB_FILE_FSYNC", "always")
+    os.chdir(tempfile.mkdtemp())
+    import models
+    from models.engine.file_storage import FileStorage
+    from models.state import State
+
+    for i in range(count):
+        models.storage.new(State(name=str(i)))
+    models.storage.save()
+    print("{} objects, fsync {}".format(count, os.environ["HBNB_FILE_FSYNC"]))
+    print("{:>8} {:>14} {:>14}".format("writers", "one write each",
+                                       "group commit"))
+    for writers in (1, 8, 32):
+        FileStorage._FileStorage__commit_max = 1
+        alone = run(models.storage, writers, seconds)
+        FileStorage._FileStorage__commit_max = 64
+        grouped = run(models.storage, writers, seconds)
+        print("{:>8} {:>12.0f}/s {:>12.0f}/s".format(writers, alone,
+                                                     grouped))
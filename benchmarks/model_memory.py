@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""
+Measures the memory taken by stored model instances in file storage mode,
+with and without HBNB_COMPACT_MODELS, and prints the bytes per object.
+Each class is written to a JSON file, loaded back by FileStorage.reload()
+in a fresh process, saved and read once as a list, so the serialized text
+cached by the instances and the storage is accounted for.
+
+usage: python3 -m benchmarks.model_memory [count]
+"""
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+
+# Attributes given to every benchmarked instance, by class name
+samples = {
+    "State": {"name": "California"},
+    "City": {"state_id": "0" * 36, "name": "San Francisco"},
+    "Amenity": {"name": "Wifi"},
+    "User": {"email": "a@b.c", "password": "pwd", "first_name": "Betty",
+             "last_name": "Holberton"},
+    "Place": {"city_id": "0" * 36, "user_id": "0" * 36, "name": "Loft",
+              "number_rooms": 2, "max_guest": 4, "price_by_night": 90},
+    "Review": {"place_id": "0" * 36, "user_id": "0" * 36, "text": "Great"},
+}
+# Moments at which the memory is measured, in order
+stages = ("loaded", "saved", "listed")
+
+
+def write(name, count):
+    """Saves count instances of class name to the JSON file"""
+    from models import storage
+    from models.engine.file_storage import class_map
+
+    cls = class_map[name]
+    storage.bulk_new(cls(**samples[name]) for i in range(count))
+
+
+def measure(name):
+    """Prints the bytes allocated once the JSON file is loaded, once it is
+    saved again and once the objects of class name are listed"""
+    import tracemalloc
+    tracemalloc.start()
+    from models import storage
+    from models.engine.file_storage import class_map
+
+    def traced():
+        """Returns the bytes allocated so far"""
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0]
+    cls = class_map[name]
+    sizes = [traced()]
+    storage.compact()
+    sizes.append(traced())
+    with storage.snapshot(cls) as snapshot:
+        snapshot.records(cls)
+    sizes.append(traced())
+    print(*sizes)
+
+
+def child(*args, compact):
+    """Runs this module with args in a child process, returns its output"""
+    env = dict(os.environ, HBNB_COMPACT_MODELS="1" if compact else "0",
+               PYTHONPATH=os.getcwd())
+    for name in ("HBNB_TYPE_STORAGE", "HBNB_FILE_JOURNAL", "HBNB_FILE_SHARED"):
+        env.pop(name, None)
+    return subprocess.run([sys.executable, "-m", "benchmarks.model_memory"] +
+                          [str(arg) for arg in args], env=env, check=True,
+                          stdout=subprocess.PIPE, universal_newlines=True,
+                          cwd=args[-1]).stdout
+
+
+def run(name, count, compact):
+    """Returns the bytes per stored instance of class name at each stage"""
+    sizes = []
+    for n in (0, count):
+        with tempfile.TemporaryDirectory() as directory:
+            child("--write", name, n, directory, compact=compact)
+            sizes.append([int(size) for size in child(
+                "--measure", name, directory, compact=compact).split()])
+    return [(full - empty) / count for empty, full in zip(*sizes)]
+
+
+if __name__ == "__main__":
+    if "--write" in sys.argv:
+        write(sys.argv[2], int(sys.argv[3]))
+        sys.exit(0)
+    if "--measure" in sys.argv:
+        measure(sys.argv[2])
+        sys.exit(0)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("{:<8} {:<8} {:>8} {:>8} {:>8}".format("class", "models",
+                                                 *stages))
+    for name in samples:
+        for compact in (False, True):
+            print("{:<8} {:<8} {:>8.1f} {:>8.1f} {:>8.1f}".format(
+                name, "compact" if compact else "dict",
+                *run(name, count, compact)))
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""
+Measures how long FileStorage.reload() takes to rebuild the objects of a
+generated file.json, as on a cold start of the API or the console, and
+the peak resident memory of the process afterwards.
+
+usage: python3 -m benchmarks.reload_time [count]
+"""
+from datetime import datetime
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import uuid
+
+
+def generate(path, count):
+    """Writes a file.json holding count States"""
+    stamp = datetime.utcnow().isoformat(timespec="microseconds")
+    separator = "{"
+    with open(path, "w") as f:
+        for i in range(count):
+            id = str(uuid.uuid4())
+            value = {"id": id, "created_at": stamp, "updated_at": stamp,
+                     "name": str(i), "__class__": "State"}
+            f.write('{}"State.{}": {}'.format(separator, id,
+                                              json.dumps(value)))
+            separator = ", "
+        f.write("}")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    os.environ.pop("HBNB_TYPE_STORAGE", None)
+    os.chdir(tempfile.mkdtemp())
+    import models
+    generate("file.json", count)
+    start = time.perf_counter()
+    models.storage.reload()
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print("reloaded {} objects in {:.2f}s ({:.1f} us/object), "
+          "peak RSS {:.0f} MiB".format(models.storage.count(), elapsed,
+                                       elapsed * 1e6 / count, peak / 1024))
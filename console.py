@@ -21,6 +21,18 @@ class HBNBCommand(cmd.Cmd):
     """ HBNH console """
     prompt = '(hbnb) '
 
+    def precmd(self, line):
+        """Picks up the changes other processes made to the storage, then
+        groups the saves made by the command into one storage flush"""
+        models.storage.refresh()
+        models.storage.begin_batch()
+        return line
+
+    def postcmd(self, stop, line):
+        """Flushes the saves grouped while running the command"""
+        models.storage.end_batch()
+        return stop
+
     def do_EOF(self, arg):
         """Exits console"""
         return True
@@ -77,9 +89,9 @@ class HBNBCommand(cmd.Cmd):
             return False
         if args[0] in classes:
             if len(args) > 1:
-                key = args[0] + "." + args[1]
-                if key in models.storage.all():
-                    print(models.storage.all()[key])
+                obj = models.storage.get(args[0], args[1])
+                if obj is not None:
+                    print(obj)
                 else:
                     print("** no instance found **")
             else:
@@ -94,9 +106,9 @@ class HBNBCommand(cmd.Cmd):
             print("** class name missing **")
         elif args[0] in classes:
             if len(args) > 1:
-                key = args[0] + "." + args[1]
-                if key in models.storage.all():
-                    models.storage.all().pop(key)
+                obj = models.storage.get(args[0], args[1])
+                if obj is not None:
+                    models.storage.delete(obj)
                     models.storage.save()
                 else:
                     print("** no instance found **")
@@ -122,6 +134,18 @@ class HBNBCommand(cmd.Cmd):
         print(", ".join(obj_list), end="")
         print("]")
 
+    def do_audit(self, arg):
+        """Reports the indexes missing from the database and the slow
+        access paths found with EXPLAIN"""
+        if models.storage_t != "db":
+            print("** audit needs the database storage **")
+            return False
+        findings = models.storage.audit()
+        for finding in findings:
+            print("[{}] {}\n    {}".format(*finding))
+        if not findings:
+            print("no missing index nor slow access path")
+
     def do_update(self, arg):
         """Update an instance based on the class name, id, attribute & value"""
         args = shlex.split(arg)
@@ -132,8 +156,8 @@ class HBNBCommand(cmd.Cmd):
             print("** class name missing **")
         elif args[0] in classes:
             if len(args) > 1:
-                k = args[0] + "." + args[1]
-                if k in models.storage.all():
+                obj = models.storage.get(args[0], args[1])
+                if obj is not None:
                     if len(args) > 2:
                         if len(args) > 3:
                             if args[0] == "Place":
@@ -147,8 +171,8 @@ class HBNBCommand(cmd.Cmd):
                                         args[3] = float(args[3])
                                     except:
                                         args[3] = 0.0
-                            setattr(models.storage.all()[k], args[2], args[3])
-                            models.storage.all()[k].save()
+                            setattr(obj, args[2], args[3])
+                            obj.save()
                         else:
                             print("** value missing **")
                     else:
@@ -4,6 +4,7 @@ Contains class BaseModel
 """
 
 from datetime import datetime
+import json
 import models
 from os import getenv
 import sqlalchemy
@@ -12,6 +13,9 @@ from sqlalchemy.ext.declarative import declarative_base
 import uuid
 
 time = "%Y-%m-%dT%H:%M:%S.%f"
+# Slotted instances without a per-instance dictionary, file storage only
+compact = models.storage_t != "db" and \
+    getenv("HBNB_COMPACT_MODELS", "0").lower() in ("1", "true", "yes")
 
 if models.storage_t == "db":
     Base = declarative_base()
@@ -19,26 +23,59 @@ else:
     Base = object
 
 
-class BaseModel:
+class CompactModel(type):
+    """
+    Metaclass of the models in compact mode. The plain class level
+    defaults of a model become slots, remembered in _defaults, and the
+    names of every slot holding a mapped attribute are kept in _fields.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        """Creates a model class whose defaults are turned into slots"""
+        defaults = {}
+        for attr, value in list(namespace.items()):
+            if not attr.startswith("_") and \
+                    isinstance(value, (str, int, float, list)):
+                defaults[attr] = namespace.pop(attr)
+        namespace["__slots__"] = namespace.get("__slots__", ()) + \
+            tuple(defaults)
+        cls = super().__new__(mcs, name, bases, namespace)
+        cls._defaults = dict(getattr(cls, "_defaults", {}), **defaults)
+        cls._fields = getattr(cls, "_fields", ()) + tuple(
+            attr for attr in namespace["__slots__"]
+            if not attr.startswith("_"))
+        return cls
+
+
+class BaseModel(metaclass=CompactModel if compact else type):
     """The BaseModel class from which future classes will be derived"""
     if models.storage_t == "db":
         id = Column(String(60), primary_key=True)
         created_at = Column(DateTime, default=datetime.utcnow)
         updated_at = Column(DateTime, default=datetime.utcnow)
+    elif compact:
+        # attributes set outside the slots live in the __extra dictionary,
+        # the cached JSON text in __text (see to_json())
+        __slots__ = ("id", "created_at", "updated_at", "__extra",
+                     "__text", "__weakref__")
+    else:
+        # __text keeps the cached JSON text out of the instance __dict__
+        __slots__ = ("__text", "__dict__", "__weakref__")
 
     def __init__(self, *args, **kwargs):
         """Initialization of the base model"""
         if kwargs:
             for key, value in kwargs.items():
+                if key in ("created_at", "updated_at"):
+                    if value and type(value) is str:
+                        value = datetime.fromisoformat(value)
+                    else:
+                        value = datetime.utcnow()
                 if key != "__class__":
                     setattr(self, key, value)
-            if kwargs.get("created_at", None) and type(self.created_at) is str:
-                self.created_at = datetime.strptime(kwargs["created_at"], time)
-            else:
+            if "created_at" not in kwargs:
                 self.created_at = datetime.utcnow()
-            if kwargs.get("updated_at", None) and type(self.updated_at) is str:
-                self.updated_at = datetime.strptime(kwargs["updated_at"], time)
-            else:
+            if "updated_at" not in kwargs:
                 self.updated_at = datetime.utcnow()
             if kwargs.get("id", None) is None:
                 self.id = str(uuid.uuid4())
@@ -47,6 +84,82 @@ class BaseModel:
             self.created_at = datetime.utcnow()
             self.updated_at = self.created_at
 
+    if compact:
+        def __getattr__(self, name):
+            """falls back on the default of a slot never assigned, then on
+            the attributes kept in the overflow dictionary"""
+            defaults = type(self)._defaults
+            if name in defaults:
+                return defaults[name]
+            if name in ("_BaseModel__extra", "_BaseModel__text"):
+                return None
+            extra = self.__extra
+            if extra is not None and name in extra:
+                return extra[name]
+            raise AttributeError("'{}' object has no attribute '{}'".format(
+                self.__class__.__name__, name))
+
+        def __setattr__(self, name, value):
+            """sets a slot, or an overflow attribute for names without one,
+            and lets storage keep its indexes current"""
+            object.__setattr__(self, "_BaseModel__text", None)
+            if name in self._fields or hasattr(type(self), name):
+                old = self.__own(name)
+                object.__setattr__(self, name, value)
+            else:
+                if self.__extra is None:
+                    object.__setattr__(self, "_BaseModel__extra", {})
+                old = self.__extra.get(name)
+                self.__extra[name] = value
+            models.storage.touch(self, name, old)
+
+        def __delattr__(self, name):
+            """deletes a slot or an overflow attribute"""
+            object.__setattr__(self, "_BaseModel__text", None)
+            if self.__extra is not None and name in self.__extra:
+                del self.__extra[name]
+            else:
+                object.__delattr__(self, name)
+
+        def __own(self, name):
+            """returns the value assigned to the slot name, None if unset"""
+            try:
+                return object.__getattribute__(self, name)
+            except AttributeError:
+                return None
+
+        @property
+        def __dict__(self):
+            """the attributes assigned on the instance, as a new dictionary
+            laid out like the one of a non compact instance"""
+            attrs = {}
+            for name in self._fields:
+                try:
+                    attrs[name] = object.__getattribute__(self, name)
+                except AttributeError:
+                    pass
+            if self.__extra:
+                attrs.update(self.__extra)
+            return attrs
+
+    elif models.storage_t != "db":
+        def __setattr__(self, name, value):
+            """sets an attribute and lets storage keep its indexes current"""
+            old = self.__dict__.get(name)
+            object.__setattr__(self, "_BaseModel__text", None)
+            super().__setattr__(name, value)
+            models.storage.touch(self, name, old)
+
+        def __delattr__(self, name):
+            """deletes an attribute and drops the cached JSON text"""
+            object.__setattr__(self, "_BaseModel__text", None)
+            super().__delattr__(name)
+
+    @property
+    def is_dirty(self):
+        """tells whether the instance has changes not saved to storage"""
+        return models.storage.is_dirty(self)
+
     def __str__(self):
         """String representation of the BaseModel class"""
         return "[{:s}] ({:s}) {}".format(self.__class__.__name__, self.id,
@@ -58,16 +171,48 @@ class BaseModel:
         models.storage.new(self)
         models.storage.save()
 
-    def to_dict(self):
-        """returns a dictionary containing all keys/values of the instance"""
+    def to_dict(self, dump=None):
+        """returns a dictionary containing all keys/values of the instance,
+        leaving out the password unless it is dumped to storage"""
+        return self.__serialize(dump is not None)
+
+    def to_json(self, dump=None):
+        """returns the JSON text of to_dict(dump). In file storage mode the
+        text of the dumped form is cached until an attribute is set or
+        deleted, and serves the public form too unless the instance has a
+        password; changing a list attribute in place does not reset it"""
+        if models.storage_t == "db" or \
+                (dump is None and hasattr(self, "password")):
+            return json.dumps(self.__serialize(dump is not None))
+        try:
+            text = self.__text
+        except AttributeError:
+            text = None
+        if text is None:
+            text = json.dumps(self.__serialize(True))
+            object.__setattr__(self, "_BaseModel__text", text)
+        return text
+
+    def _keep_json(self, text):
+        """caches text, the JSON text storage read the instance from, as
+        the text of to_dict(dump="Yes") in file storage mode"""
+        if models.storage_t != "db":
+            object.__setattr__(self, "_BaseModel__text", text)
+
+    def __serialize(self, dump):
+        """builds the dictionary returned by to_dict()"""
         new_dict = self.__dict__.copy()
         if "created_at" in new_dict:
-            new_dict["created_at"] = new_dict["created_at"].strftime(time)
+            new_dict["created_at"] = new_dict["created_at"].isoformat(
+                timespec="microseconds")
         if "updated_at" in new_dict:
-            new_dict["updated_at"] = new_dict["updated_at"].strftime(time)
+            new_dict["updated_at"] = new_dict["updated_at"].isoformat(
+                timespec="microseconds")
         new_dict["__class__"] = self.__class__.__name__
         if "_sa_instance_state" in new_dict:
             del new_dict["_sa_instance_state"]
+        if not dump and "password" in new_dict:
+            del new_dict["password"]
         return new_dict
 
     def delete(self):
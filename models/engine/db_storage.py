@@ -3,56 +3,352 @@
 This script encapsulates the DBStorage class for database interactions.
 """
 
+from datetime import datetime
 import models
 from models.amenity import Amenity
 from models.base_model import BaseModel, Base
 from models.city import City
+from models.engine.index_audit import audit
+from models.engine.snapshot import PAGE_SIZE, Record, Snapshot
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import and_, create_engine, event, func, inspect, or_, \
+    select, union_all
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, scoped_session, selectinload, \
+    sessionmaker
+from sqlalchemy.pool import QueuePool
+import threading
+import time
 
 # Dictionary mapping class names to their corresponding classes
 class_map = {"Amenity": Amenity, "City": City,
              "Place": Place, "Review": Review, "State": State, "User": User}
 
+# Number of ids bound to a single IN (...) clause by bulk_update()
+BULK_CHUNK = 1000
+
+
+class PoolMetrics:
+    """
+    Counters of the connection pool: connections opened and invalidated,
+    checkouts and checkins, and how long checkouts waited for a free
+    connection, including the ones that timed out.
+    """
+
+    def __init__(self):
+        """Creates zeroed counters"""
+        self.__lock = threading.Lock()
+        # dictionary - counter name -> number of events
+        self.__counts = dict.fromkeys(("connects", "checkouts", "checkins",
+                                       "invalidations", "timeouts"), 0)
+        # float - seconds waited by all the checkouts, and by the longest
+        self.__wait_total = 0.0
+        self.__wait_max = 0.0
+
+    def attach(self, engine):
+        """Counts the events of the pool of engine"""
+        for name, counter in (("connect", "connects"),
+                              ("checkout", "checkouts"),
+                              ("checkin", "checkins"),
+                              ("invalidate", "invalidations")):
+            event.listen(engine, name, self.__counter(counter))
+
+    def waited(self, seconds, timed_out=False):
+        """Records a checkout that waited seconds for a connection"""
+        with self.__lock:
+            self.__wait_total += seconds
+            self.__wait_max = max(self.__wait_max, seconds)
+            if timed_out:
+                self.__counts["timeouts"] += 1
+
+    def stats(self):
+        """Returns the counters and the total, mean and longest wait"""
+        with self.__lock:
+            stats = dict(self.__counts)
+            checkouts = stats["checkouts"] + stats["timeouts"]
+            stats["wait_total"] = self.__wait_total
+            stats["wait_max"] = self.__wait_max
+            stats["wait_mean"] = self.__wait_total / checkouts \
+                if checkouts else 0.0
+        return stats
+
+    def __counter(self, name):
+        """Returns a pool event listener adding one to counter name"""
+        def count(*args):
+            """Adds one to the counter"""
+            with self.__lock:
+                self.__counts[name] += 1
+        return count
+
+
+# PoolMetrics - counters of the connection pool of the database engine
+pool_metrics = PoolMetrics()
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool timing how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        """Checks a connection out, recording the time it took"""
+        start = time.monotonic()
+        try:
+            connection = super()._do_get()
+        except sqlalchemy.exc.TimeoutError:
+            pool_metrics.waited(time.monotonic() - start, timed_out=True)
+            raise
+        pool_metrics.waited(time.monotonic() - start)
+        return connection
+
+
+def engine_options(url):
+    """
+    Returns the create_engine() options tuning the connection pool for
+    url, read from the environment:
+    HBNB_DB_POOL_SIZE - connections kept open (5)
+    HBNB_DB_POOL_OVERFLOW - connections opened past the size on bursts (10)
+    HBNB_DB_POOL_TIMEOUT - seconds a checkout waits for a connection (30)
+    HBNB_DB_POOL_RECYCLE - seconds after which a connection is replaced,
+    to stay below the server wait_timeout (3600, -1 never)
+    HBNB_DB_POOL_PRE_PING - test connections on checkout (1) or not (0)
+    An in-memory SQLite database keeps the single connection it needs.
+    """
+    options = {"pool_pre_ping": getenv("HBNB_DB_POOL_PRE_PING", "1") != "0",
+               "pool_recycle": int(getenv("HBNB_DB_POOL_RECYCLE", 3600))}
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and \
+            url.database in (None, "", ":memory:"):
+        return options
+    options.update(poolclass=MeteredQueuePool,
+                   pool_size=int(getenv("HBNB_DB_POOL_SIZE", 5)),
+                   max_overflow=int(getenv("HBNB_DB_POOL_OVERFLOW", 10)),
+                   pool_timeout=float(getenv("HBNB_DB_POOL_TIMEOUT", 30)))
+    return options
+
+
+def load_options(cls, load):
+    """
+    Returns the loader options fetching the relationships of cls named
+    in load along with the objects of cls. Each name is a path of
+    relationships joined by dots, such as "cities.places"; every step is
+    loaded with one SELECT ... IN query for all the objects at once,
+    instead of one query per object on first access.
+    """
+    options = []
+    for path in load or ():
+        option = None
+        model = cls
+        for name in path.split("."):
+            attr = getattr(model, name)
+            option = selectinload(attr) if option is None else \
+                option.selectinload(attr)
+            model = attr.property.mapper.class_
+        options.append(option)
+    return options
+
+
+def select_objects(session, cls, limit=None, after=None, **filters):
+    """
+    Returns the query for the objects of cls whose columns equal filters,
+    paged in (created_at, id) order by giving the (created_at, id) pair to
+    start after and/or a limit.
+    """
+    query = session.query(cls)
+    if filters:
+        query = query.filter_by(**filters)
+    return page_query(query, cls, limit, after)
+
+
+def page_query(query, cls, limit=None, after=None):
+    """
+    Returns query, selecting objects of cls, ordered by (created_at, id)
+    and narrowed to the objects after the (created_at, id) pair after and
+    to at most limit rows when either is given, unchanged otherwise.
+    """
+    if limit is not None or after is not None:
+        query = query.order_by(cls.created_at, cls.id)
+        if after is not None:
+            created_at, id = after
+            query = query.filter(or_(
+                cls.created_at > created_at,
+                and_(cls.created_at == created_at, cls.id > id)))
+        if limit is not None:
+            query = query.limit(limit)
+    return query
+
+
+def search_query(query, states=(), cities=(), amenities=()):
+    """
+    Returns query, selecting from places, narrowed to the places located
+    in one of the given states or cities (every place when neither is
+    given) that offer all the given amenities, unknown ids being ignored.
+    Places are joined to their city when states or cities narrow them, and
+    to the rows of place_amenity naming a wanted amenity, keeping the
+    places with as many such rows as there are known wanted amenities.
+    """
+    if states or cities:
+        query = query.join(City, Place.city_id == City.id).filter(or_(
+            City.id.in_(list(cities)), City.state_id.in_(list(states))))
+    if amenities:
+        wanted = list(set(amenities))
+        links = Base.metadata.tables["place_amenity"]
+        known = select(func.count(Amenity.id)).where(
+            Amenity.id.in_(wanted)).scalar_subquery()
+        query = query.outerjoin(links, and_(
+            links.c.place_id == Place.id,
+            links.c.amenity_id.in_(wanted))).group_by(Place.id).having(
+                func.count(links.c.amenity_id) == known)
+    return query
+
+
+class DBSnapshot(Snapshot):
+    """
+    Snapshot reading the database through its own read-only transaction
+    at the REPEATABLE READ isolation level, so every read sees the rows
+    as they were when the first one ran. It must be closed once done.
+    """
+
+    def __init__(self, engine):
+        """Opens a connection to engine for the snapshot transaction"""
+        if engine.dialect.name == "mysql":
+            self.__connection = engine.connect().execution_options(
+                isolation_level="REPEATABLE READ")
+            self.__connection.exec_driver_sql(
+                "START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+        else:
+            self.__connection = engine.connect().execution_options(
+                isolation_level="SERIALIZABLE")
+        self.__session = Session(bind=self.__connection)
+
+    def close(self):
+        """Ends the snapshot transaction and releases its connection"""
+        self.__session.close()
+        self.__connection.close()
+
+    def records(self, cls, limit=None, after=None, **filters):
+        """
+        Returns the list of Records of the objects of cls whose columns
+        equal filters, in (created_at, id) order, starting after the
+        (created_at, id) pair after and holding at most limit Records.
+        """
+        cls = self.__class(cls)
+        query = select_objects(self.__session, cls, limit, after, **filters)
+        if limit is None and after is None:
+            query = query.order_by(cls.created_at, cls.id)
+        return [self.__record(obj) for obj in query]
+
+    def stream(self, cls, **filters):
+        """Yields the Records of the objects of cls whose columns equal
+        filters, in (created_at, id) order, fetching PAGE_SIZE rows at a
+        time, then closes the snapshot, also when the generator is closed
+        before the end"""
+        try:
+            cls = self.__class(cls)
+            query = select_objects(self.__session, cls, **filters)
+            query = query.order_by(cls.created_at, cls.id)
+            for obj in query.yield_per(PAGE_SIZE):
+                yield self.__record(obj)
+        finally:
+            self.close()
+
+    def get(self, cls, id):
+        """Returns the Record of the object of cls with id, or None"""
+        obj = self.__session.get(self.__class(cls), id)
+        return None if obj is None else self.__record(obj)
+
+    def get_all(self, cls, ids):
+        """Returns the Records of the objects of cls with the given ids,
+        in the order of ids, leaving out the ids of missing objects"""
+        cls = self.__class(cls)
+        ids = list(ids)
+        found = {obj.id: obj for obj in
+                 self.__session.query(cls).filter(cls.id.in_(ids))}
+        return [self.__record(found[id]) for id in ids if id in found]
+
+    def count(self, cls=None):
+        """Returns the number of objects of cls, or of every object"""
+        classes = class_map.values() if cls is None else [self.__class(cls)]
+        return sum(self.__session.scalar(select(func.count())
+                                         .select_from(clss))
+                   for clss in classes)
+
+    def search_places(self, states=(), cities=(), amenities=(),
+                      limit=None, after=None):
+        """Returns the ids of the places the storage search_places() finds
+        with the same arguments, read in the snapshot transaction"""
+        query = search_query(self.__session.query(Place.id), states, cities,
+                             amenities)
+        return [id for id, in page_query(query, Place, limit, after)]
+
+    def __class(self, cls):
+        """Returns the class of cls, a class or a class name"""
+        return class_map[cls] if isinstance(cls, str) else cls
+
+    def __record(self, obj):
+        """Returns the Record of obj"""
+        return Record(obj.created_at, obj.id, obj.to_json())
+
+
 class DBStorage:
     """
     This class facilitates interactions with the MySQL database.
     """
     __engine = None
     __session = None
+    # dictionary - class name -> (number of changes, time of the last one)
+    __versions = {}
+    # datetime - reported as the last change of a class never changed
+    __started = datetime.utcnow()
+    # list - callables told about every change, see subscribe()
+    __listeners = []
 
     def __init__(self):
         """
         Constructs a DBStorage object, initializing the database connection.
+        HBNB_DB_URL, when set, replaces the MySQL database named by the
+        HBNB_MYSQL_* variables (for instance sqlite:///hbnb_test.db to
+        exercise the storage and its pool locally); see engine_options()
+        for the pool settings.
         """
         HBNB_MYSQL_USER = getenv('HBNB_MYSQL_USER')
         HBNB_MYSQL_PWD = getenv('HBNB_MYSQL_PWD')
         HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
         HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
         HBNB_ENV = getenv('HBNB_ENV')
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
-                                      format(HBNB_MYSQL_USER,
-                                             HBNB_MYSQL_PWD,
-                                             HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+        url = getenv('HBNB_DB_URL') or \
+            'mysql+mysqldb://{}:{}@{}/{}'.format(HBNB_MYSQL_USER,
+                                                 HBNB_MYSQL_PWD,
+                                                 HBNB_MYSQL_HOST,
+                                                 HBNB_MYSQL_DB)
+        self.__engine = create_engine(url, **engine_options(url))
+        pool_metrics.attach(self.__engine)
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
 
-    def all(self, cls=None):
+    def all(self, cls=None, limit=None, after=None, load=None, **filters):
         """
         Queries the current database session for all objects of a given class.
+        The objects of cls can be narrowed to those whose columns equal
+        filters, and paged in (created_at, id) order by giving the
+        (created_at, id) pair to start after and/or a limit. The
+        relationships of cls named in load are fetched along, see
+        load_options().
         """
         new_dict = {}
         for clss in class_map:
-            if cls is None or cls is class_map[clss] or cls is clss:
-                objs = self.__session.query(class_map[clss]).all()
-                for obj in objs:
+            if cls is None or cls is class_map[clss] or cls == clss:
+                if cls is None:
+                    query = self.__session.query(class_map[clss])
+                else:
+                    query = select_objects(self.__session, class_map[clss],
+                                           limit, after, **filters)
+                    query = query.options(*load_options(class_map[clss],
+                                                        load))
+                for obj in query:
                     key = obj.__class__.__name__ + '.' + obj.id
                     new_dict[key] = obj
         return (new_dict)
@@ -62,12 +358,77 @@ class DBStorage:
         Adds an object to the current database session.
         """
         self.__session.add(obj)
+        self.__changed(obj)
+
+    def bulk_new(self, objs):
+        """
+        Adds every object of objs and commits them in one transaction. The
+        unit of work sends the INSERTs of each table as one executemany
+        batch. Returns the list of objects added.
+        """
+        objs = list(objs)
+        for obj in objs:
+            self.new(obj)
+        self.save()
+        return objs
+
+    def bulk_update(self, cls, updates):
+        """
+        Sets the attributes of the objects of cls (a class or a class name)
+        given as (id, {attribute: value}) pairs by updates, stamps their
+        updated_at and commits them in one transaction. The objects are
+        fetched BULK_CHUNK ids per query, and the UPDATEs setting the same
+        columns go out as one executemany batch. Unknown ids are skipped.
+        Returns the list of objects updated.
+        """
+        if isinstance(cls, str):
+            cls = class_map[cls]
+        updates = list(updates)
+        ids = [id for id, changes in updates]
+        objs = {}
+        for i in range(0, len(ids), BULK_CHUNK):
+            objs.update((obj.id, obj) for obj in self.__session.query(cls)
+                        .filter(cls.id.in_(ids[i:i + BULK_CHUNK])))
+        now = datetime.utcnow()
+        updated = []
+        for id, changes in updates:
+            obj = objs.get(id)
+            if obj is None:
+                continue
+            for attr, value in changes.items():
+                setattr(obj, attr, value)
+            obj.updated_at = now
+            updated.append(obj)
+        self.save()
+        return updated
 
     def save(self):
         """
         Commits all changes of the current database session.
         """
-        self.__session.commit()
+        session = self.__session
+        changes = []
+        for obj in set(session.new).union(session.dirty, session.deleted):
+            changes.append((obj, None, None))
+            state = inspect(obj)
+            for attr in state.mapper.column_attrs:
+                old = state.attrs[attr.key].history.deleted
+                if old:
+                    changes.append((obj, attr.key, old[0]))
+        session.commit()
+        for obj, attr, old in changes:
+            self.__changed(obj, attr, old)
+
+    def begin_batch(self):
+        """
+        Opens a batch of saves. Every save commits its own transaction,
+        so there is nothing to coalesce.
+        """
+
+    def end_batch(self):
+        """
+        Closes a batch of saves opened by begin_batch().
+        """
 
     def delete(self, obj=None):
         """
@@ -75,6 +436,120 @@ class DBStorage:
         """
         if obj is not None:
             self.__session.delete(obj)
+            self.__changed(obj)
+
+    def pending_changes(self):
+        """
+        Returns the objects created, changed and deleted in the current
+        session since the last commit, as lists under the keys "new",
+        "dirty" and "deleted".
+        """
+        return {"new": list(self.__session.new),
+                "dirty": [obj for obj in self.__session.dirty
+                          if self.__session.is_modified(obj)],
+                "deleted": list(self.__session.deleted)}
+
+    def is_dirty(self, obj):
+        """
+        Tells whether obj has changes that have not been committed yet.
+        """
+        session = self.__session
+        if obj in session.new or obj in session.deleted:
+            return True
+        return obj in session and session.is_modified(obj)
+
+    def search_places(self, states=(), cities=(), amenities=(),
+                      limit=None, after=None):
+        """
+        Returns the places located in one of the given states or cities
+        (every place when neither is given) that offer all the given
+        amenities, paged as select_objects() does. Unknown ids are
+        ignored. The whole search is a single query, see search_query().
+        """
+        query = search_query(self.__session.query(Place), states, cities,
+                             amenities)
+        return page_query(query, Place, limit, after).all()
+
+    def snapshot(self, cls=None):
+        """
+        Returns a DBSnapshot reading the objects through a read-only
+        REPEATABLE READ transaction of its own; cls is accepted for
+        compatibility with the file storage and does not narrow it.
+        """
+        return DBSnapshot(self.__engine)
+
+    def audit(self):
+        """
+        Returns the index_audit Findings of the database: the indexes the
+        models declare that it lacks, the foreign keys it leaves unindexed
+        and the access paths EXPLAIN shows reading whole tables.
+        """
+        return audit(self.__engine, Base.metadata)
+
+    def pool_stats(self):
+        """
+        Returns the PoolMetrics counters along with the size of the
+        connection pool and its connections checked in, checked out and
+        open past the size.
+        """
+        stats = pool_metrics.stats()
+        pool = self.__engine.pool
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), checked_in=pool.checkedin(),
+                         checked_out=pool.checkedout(),
+                         overflow=max(pool.overflow(), 0))
+        return stats
+
+    def subscribe(self, listener):
+        """
+        Registers listener to be called as listener(obj, attr, old) every
+        time obj is added, deleted or committed with its column attr
+        changed from old (attr and old are None otherwise).
+        """
+        self.__listeners.append(listener)
+
+    def version(self, cls):
+        """
+        Returns a counter increased by every change this process made to
+        an object of cls.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        return self.__versions.get(cls, (0,))[0]
+
+    def last_modified(self, cls):
+        """
+        Returns the time of the last change this process made to an
+        object of cls.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        return self.__versions.get(cls, (0, self.__started))[1]
+
+    def stamp(self, cls):
+        """
+        Returns the (version, last_modified) pair of cls read from the
+        database in one query, so changes made by any process show:
+        version is made of the row count and the latest updated_at, and
+        last_modified is that updated_at (the start of this process for
+        an empty table). Deleting a row other than the latest changes the
+        version but not last_modified.
+        """
+        if isinstance(cls, str):
+            cls = class_map[cls]
+        count, latest = self.__session.execute(
+            select(func.count(), func.max(cls.updated_at))
+            .select_from(cls)).one()
+        last_modified = self.__started if latest is None else latest
+        return "{}.{}".format(count, last_modified.isoformat()), last_modified
+
+    def __changed(self, obj, attr=None, old=None):
+        """Records a change to obj and tells the listeners about it"""
+        name = obj.__class__.__name__
+        count = self.__versions.get(name, (0,))[0]
+        self.__versions[name] = (count + 1, datetime.utcnow())
+        for listener in self.__listeners:
+            listener(obj, attr, old)
 
     def reload(self):
         """
@@ -85,31 +560,42 @@ class DBStorage:
         Session = scoped_session(sess_factory)
         self.__session = Session
 
+    def refresh(self):
+        """
+        Picks up the changes made by other processes. Nothing to do, the
+        next query of the session reads them from the database.
+        """
+
     def close(self):
         """
         Removes the session from the current database session.
         """
         self.__session.remove()
 
-    def get(self, cls, id):
+    def get(self, cls, id, load=None):
         """
-        Retrieves an object based on its class name and ID, or returns None if not found.
+        Retrieves an object by class (or class name) and primary key, or
+        returns None if not found. The relationships named in load are
+        fetched along, see load_options().
         """
-        objects = self.__session.query(class_map[cls])
-        for obj in objects:
-            if obj.id == id:
-                return obj
-        return None
+        if isinstance(cls, str):
+            cls = class_map.get(cls)
+        if cls is None or id is None:
+            return None
+        return self.__session.get(cls, id, options=load_options(cls, load))
 
     def count(self, cls=None):
         """
-        Counts the number of objects in storage matching a given class name.
-        If no class name is provided, counts all objects in storage.
+        Counts the number of objects in storage matching a given class or
+        class name. If no class is provided, counts all objects in storage.
         """
-        nobjects = 0
-        for clss in class_map:
-            if cls is None or cls is class_map[clss] or cls is clss:
-                nobjects += len(self.__session.query(class_map[clss]).all())
-        return nobjects
-
-
+        if cls is not None:
+            if isinstance(cls, str):
+                cls = class_map.get(cls)
+            if cls is None:
+                return 0
+            return self.__session.scalar(select(func.count())
+                                         .select_from(cls))
+        counts = union_all(*[select(func.count()).select_from(clss)
+                             for clss in class_map.values()])
+        return sum(self.__session.execute(counts).scalars())
@@ -1,106 +1,1057 @@
 #!/usr/bin/python3
 """
-This script encapsulates the FileStorage class for serializing and deserializing instances to/from a JSON file.
+This script encapsulates the FileStorage class for serializing and
+deserializing instances to/from a JSON file.
 """
 
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime
+import fcntl
 import json
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
 from models.place import Place
+from models.engine.rwlock import ReadWriteLock
+from models.engine.search_index import PlaceSearchIndex
+from models.engine.snapshot import PAGE_SIZE, Record, Snapshot
 from models.review import Review
 from models.state import State
 from models.user import User
+import os
+from os import getenv, path, stat
+import tempfile
+import threading
+import time
 
 # Dictionary mapping class names to their corresponding classes
 class_map = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
              "Place": Place, "Review": Review, "State": State, "User": User}
 
+# Foreign-key attributes that get a secondary index, by class name
+indexed_fields = {"City": ("state_id",),
+                  "Place": ("city_id", "user_id"),
+                  "Review": ("place_id", "user_id")}
+
+
+def iter_members(f, size=1 << 16):
+    """
+    Yields the (key, value, JSON text of value) triples of the JSON object
+    stored in the text file f, reading it size characters at a time so
+    that only one member is held in memory on top of the buffer.
+    """
+    decode = json.JSONDecoder().raw_decode
+    buf = ""
+    pos = 0
+    eof = False
+    # string - what comes next: "{", "first", "key", ":", "value" or ","
+    expect = "{"
+    key = None
+    # object - stands for the token when more text has to be read first,
+    # since a decoded token may be None itself (JSON null)
+    more = object()
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n":
+            pos += 1
+        token = more
+        if pos < len(buf):
+            char = buf[pos]
+            if expect == "first" and char == "}" or \
+                    expect == "," and char == "}":
+                return
+            if expect in ("{", ":", ","):
+                if char != expect:
+                    raise ValueError("Expecting '{}' at {}".format(expect,
+                                                                   pos))
+                pos += 1
+                expect = {"{": "first", ":": "value", ",": "key"}[expect]
+                continue
+            try:
+                token, end = decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                if end == len(buf) and not eof:
+                    token = more
+        if token is more:
+            if eof:
+                raise ValueError("Unterminated JSON object")
+            chunk = f.read(size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        if expect == "value":
+            yield key, token, buf[pos:end]
+            expect = ","
+        else:
+            key = token
+            expect = ":"
+        pos = end
+
+
+class FileSnapshot(Snapshot):
+    """
+    Snapshot of the file storage. Taking it copies, under the read lock of
+    the storage, only the sorted (created_at, id) list and the object
+    references of the classes it reads; these copies are shared by the
+    snapshots taken until the class changes again. Reads serialize the
+    objects outside the lock, so objects stored or removed afterwards do
+    not show, while an object changed in place shows its new attributes.
+    """
+
+    def __init__(self, storage, views, names):
+        """Creates a snapshot of storage copying the classes names now,
+        and any other class when first read, through views(names), which
+        returns the (order, objects) pair of each class"""
+        self.__storage = storage
+        self.__views = views
+        self.__copies = views(names)
+
+    def records(self, cls, limit=None, after=None, **filters):
+        """
+        Returns the list of Records of the objects of cls whose attributes
+        equal filters, in (created_at, id) order, starting after the
+        (created_at, id) pair after and holding at most limit Records.
+        """
+        name = self.__name(cls)
+        return self.__read(name, self.__page(self.__order(name, filters),
+                                             limit, after))
+
+    def stream(self, cls, **filters):
+        """Yields the Records of records(cls, **filters), reading them in
+        keyset pages of PAGE_SIZE Records, then closes the snapshot, also
+        when the generator is closed before the end"""
+        try:
+            name = self.__name(cls)
+            order = self.__order(name, filters)
+            after = None
+            while True:
+                page = self.__page(order, PAGE_SIZE, after)
+                for record in self.__read(name, page):
+                    yield record
+                if len(page) < PAGE_SIZE:
+                    break
+                after = page[-1]
+        finally:
+            self.close()
+
+    def get_all(self, cls, ids):
+        """Returns the Records of the objects of cls with the given ids,
+        in the order of ids, leaving out the ids of missing objects"""
+        name = self.__name(cls)
+        objects = self.__copy(name)[1]
+        keys = (name + "." + id for id in ids)
+        return [Record(obj.created_at, obj.id, obj.to_json())
+                for obj in (objects.get(key) for key in keys)
+                if obj is not None]
+
+    def count(self, cls=None):
+        """Returns the number of objects of cls, or of every object"""
+        names = [self.__name(cls)] if cls else list(class_map)
+        return sum(len(self.__copy(name)[1]) for name in names)
+
+    def search_places(self, states=(), cities=(), amenities=(),
+                      limit=None, after=None):
+        """Returns the ids of the places the storage search_places() finds
+        with the same arguments, among the places the snapshot sees"""
+        objects = self.__copy("Place")[1]
+        places = self.__storage.search_places(states, cities, amenities)
+        places = [place for place in places
+                  if objects.get("Place." + place.id) is place]
+        if limit is None and after is None:
+            return [place.id for place in places]
+        order = sorted((place.created_at, place.id) for place in places)
+        return [id for created_at, id in self.__page(order, limit, after)]
+
+    def __name(self, cls):
+        """Returns the name of cls, a class or a class name"""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def __copy(self, name):
+        """Returns the (order, objects) pair copied for class name"""
+        if name not in self.__copies:
+            self.__copies.update(self.__views([name]))
+        return self.__copies[name]
+
+    def __order(self, name, filters):
+        """Returns the sorted (created_at, id) list of the objects of class
+        name whose attributes equal filters"""
+        order, objects = self.__copy(name)
+        if not filters:
+            return order
+        objs = objects.values()
+        for attr, value in filters.items():
+            if attr in indexed_fields.get(name, ()):
+                objs = [obj for obj in self.__storage.related(name, attr,
+                                                              value)
+                        if objects.get(name + "." + obj.id) is obj]
+                break
+        return sorted((obj.created_at, obj.id) for obj in objs
+                      if all(getattr(obj, attr, None) == value
+                             for attr, value in filters.items()))
+
+    def __page(self, order, limit, after):
+        """Returns the entries of the sorted (created_at, id) list order
+        following the pair after, at most limit of them"""
+        start = 0 if after is None else bisect_right(order, tuple(after))
+        return order[start:] if limit is None else order[start:start + limit]
+
+    def __read(self, name, entries):
+        """Returns the Records of the objects of class name listed by the
+        (created_at, id) pairs entries"""
+        objects = self.__copy(name)[1]
+        return [Record(created_at, id, objects[name + "." + id].to_json())
+                for created_at, id in entries]
+
+
 class FileStorage:
     """
-    This class handles the serialization of instances to a JSON file and the deserialization back to instances.
+    This class handles the serialization of instances to a JSON file and
+    the deserialization back to instances.
     """
     # string - path to the JSON file
     __file_path = "file.json"
+    # string - path to the append-only journal used in journal mode
+    __journal_path = "file.json.journal"
+    # bool - whether several processes share the files: writes hold an
+    # exclusive lock on __lock_path and catch up with the other processes
+    # first, reads hold a shared one (implies the journal mode)
+    __shared = getenv("HBNB_FILE_SHARED", "0") != "0"
+    # string - path to the file locked by the processes sharing the files
+    __lock_path = "file.json.lock"
+    # bool - whether this process holds the lock on __lock_path
+    __file_locked = False
+    # bool - append changes to the journal instead of rewriting the file
+    __journal = getenv("HBNB_FILE_JOURNAL", "0") != "0" or __shared
+    # int - journal size in bytes past which it is folded into the file
+    __journal_limit = int(getenv("HBNB_FILE_JOURNAL_LIMIT", 1 << 20))
+    # string - when written files are flushed to disk: "always" on every
+    # save, "batched" once per batch (see begin_batch()) or "never"
+    __fsync = getenv("HBNB_FILE_FSYNC", "batched")
+    # threading.local - depth of the open batches of the current thread
+    # and whether a save was put off until the outermost one ends
+    __batch = threading.local()
+    # float - seconds a group commit leader waits for more saves to join
+    __commit_window = float(getenv("HBNB_COMMIT_WINDOW", 0))
+    # int - largest number of saves covered by one group commit write
+    __commit_max = int(getenv("HBNB_COMMIT_MAX", 64))
+    # ReadWriteLock - held for reading by the lookups and for writing by
+    # the changes to the objects, the indexes and the pending changes
+    __lock = ReadWriteLock()
+    # threading.RLock - serializes the writes and reads of the files
+    __io = threading.RLock()
+    # threading.Condition - signals the saves waiting on a group commit
+    __commit = threading.Condition()
+    # int - saves requested so far, and covered by a completed write
+    __requested = 0
+    __durable = 0
+    # bool - whether a save is leading a group commit
+    __leading = False
+    # tuple - (inode, size, mtime) of the JSON file and of the journal as
+    # last read or written by this process, None when missing
+    __file_seen = None
+    __journal_seen = None
+    # int - number of journal bytes already applied
+    __journal_offset = 0
+    # set - names of the classes left out of reload() until first accessed,
+    # every class missing from the comma separated HBNB_FILE_PRELOAD list
+    __deferred = set() if getenv("HBNB_FILE_PRELOAD") is None else \
+        set(class_map) - set(getenv("HBNB_FILE_PRELOAD").split(","))
     # dictionary - empty but will store all objects by <class name>.id
     __objects = {}
+    # dictionary - class name -> {<class name>.id: object}
+    __classes = {}
+    # dictionary - (class name, attribute) -> {value: {<key>: object}}
+    __indexes = {}
+    # PlaceSearchIndex - postings used to answer places_search
+    __search = PlaceSearchIndex()
+    # dictionary - class name -> sorted list of (created_at, id), built on
+    # the first paged read of the class
+    __order = {}
+    # dictionary - class name -> (version, order, objects) copied by the
+    # last snapshot of the class, see __views()
+    __copies = {}
+    # dictionary - <key> -> ("new" | "dirty" | "deleted", object) for
+    # every object changed since the last save
+    __pending = {}
+    # dictionary - class name -> (number of changes, time of the last one)
+    __versions = {}
+    # datetime - reported as the last change of a class never changed
+    __started = datetime.utcnow()
+    # list - callables told about every change, see subscribe()
+    __listeners = []
 
-    def all(self, cls=None):
+    def all(self, cls=None, limit=None, after=None, load=None, **filters):
         """
-        Returns the dictionary __objects, filtered by class if specified.
+        Returns a copy of the dictionary __objects, or of the partition
+        holding the objects of cls (a class or a class name) if specified.
+        The objects of cls can be narrowed to those whose attributes equal
+        filters, and paged in (created_at, id) order by giving the
+        (created_at, id) pair to start after and/or a limit.
+        load names relationships to load along (see DBStorage); they are
+        answered from the secondary indexes here, so it is ignored.
         """
-        if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
-        return self.__objects
+        if cls is None:
+            self.__require()
+            with self.__lock.read():
+                return dict(self.__objects)
+        name = self.__class_name(cls)
+        self.__require(name)
+        with self.__lock.read():
+            return self.__select(name, limit, after, filters)
+
+    def __select(self, name, limit, after, filters, ordered=False):
+        """Returns the objects of class name selected by all(), in
+        (created_at, id) order when paged or ordered"""
+        paged = ordered or limit is not None or after is not None
+        if filters:
+            objs = self.__filter(name, filters)
+            if not paged:
+                return {name + "." + obj.id: obj for obj in objs}
+            order = sorted((obj.created_at, obj.id) for obj in objs)
+        elif not paged:
+            return dict(self.__classes.get(name, {}))
+        else:
+            order = self.__ordered(name)
+        start = 0 if after is None else bisect_right(order, tuple(after))
+        stop = len(order) if limit is None else start + limit
+        objects = self.__objects
+        new_dict = {}
+        for created_at, id in order[start:stop]:
+            key = name + "." + id
+            new_dict[key] = objects[key]
+        return new_dict
 
     def new(self, obj):
         """
-        Adds an object to the __objects dictionary with the key format <obj class name>.id.
+        Adds an object to the __objects dictionary with the key format
+        <obj class name>.id and registers it in the secondary indexes.
         """
-        if obj is not None:
-            key = obj.__class__.__name__ + "." + obj.id
-            self.__objects[key] = obj
+        with self.__lock.write():
+            if obj is not None:
+                key = obj.__class__.__name__ + "." + obj.id
+                old = self.__objects.get(key)
+                if old is obj:
+                    return
+                self.__put(obj)
+                state = self.__pending.get(key, ("new",))[0]
+                if old is not None or state != "new":
+                    state = "dirty"
+                self.__pending[key] = (state, obj)
+
+    def bulk_new(self, objs):
+        """
+        Adds every object of objs and saves them all with a single write,
+        instead of the write per object made by BaseModel.save().
+        Returns the list of objects added.
+        """
+        objs = list(objs)
+        with self.__lock.write():
+            for obj in objs:
+                self.new(obj)
+        self.save()
+        return objs
+
+    def bulk_update(self, cls, updates):
+        """
+        Sets the attributes of the objects of cls (a class or a class name)
+        given as (id, {attribute: value}) pairs by updates, stamps their
+        updated_at and saves them all with a single write. Unknown ids are
+        skipped. Returns the list of objects updated.
+        """
+        name = self.__class_name(cls)
+        self.__require(name)
+        now = datetime.utcnow()
+        updated = []
+        with self.__lock.write():
+            for id, changes in updates:
+                obj = self.__objects.get("{}.{}".format(name, id))
+                if obj is None:
+                    continue
+                for attr, value in changes.items():
+                    setattr(obj, attr, value)
+                obj.updated_at = now
+                updated.append(obj)
+        self.save()
+        return updated
 
     def save(self):
         """
-        Serializes the __objects dictionary to the JSON file specified by __file_path.
+        Serializes the __objects dictionary to the JSON file specified by
+        __file_path. In journal mode only the objects created, changed or
+        deleted since the last save are appended to the journal.
+        With the "batched" fsync policy, saves made inside a batch are put
+        off until the batch ends.
+        Concurrent saves are group committed: the first one leads, waits
+        up to the commit window for others to join, and writes once for
+        all of them. Every save returns once a write covering it is done.
+        """
+        if self.__fsync == "batched" and \
+                getattr(self.__batch, "depth", 0):
+            self.__batch.due = True
+            return
+        commit = self.__commit
+        with commit:
+            FileStorage.__requested += 1
+            ticket = self.__requested
+            commit.notify_all()
+            while self.__leading and self.__durable < ticket:
+                commit.wait()
+            if self.__durable >= ticket:
+                return
+            FileStorage.__leading = True
+            deadline = time.monotonic() + self.__commit_window
+            while self.__requested - self.__durable < self.__commit_max:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                commit.wait(remaining)
+            target = min(self.__requested,
+                         self.__durable + self.__commit_max)
+        try:
+            with self.__io:
+                self.__write()
+        except BaseException:
+            target = self.__durable
+            raise
+        finally:
+            with commit:
+                FileStorage.__durable = max(self.__durable, target)
+                FileStorage.__leading = False
+                commit.notify_all()
+
+    def begin_batch(self):
         """
-        json_objects = {}
-        for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict(dump="Yes")
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+        Opens a batch in the current thread: until the matching end_batch()
+        all saves are coalesced into a single write and flush. Batches nest.
+        """
+        self.__batch.depth = getattr(self.__batch, "depth", 0) + 1
+
+    def end_batch(self):
+        """
+        Closes the batch opened last by the current thread, saving the
+        objects if a save was put off and no outer batch is left open.
+        """
+        depth = getattr(self.__batch, "depth", 0)
+        self.__batch.depth = max(depth - 1, 0)
+        if depth <= 1 and getattr(self.__batch, "due", False):
+            self.__batch.due = False
+            self.save()
+
+    def pending_changes(self):
+        """
+        Returns the objects created, changed and deleted since the last
+        save, as lists under the keys "new", "dirty" and "deleted".
+        """
+        changes = {"new": [], "dirty": [], "deleted": []}
+        with self.__lock.read():
+            for state, obj in self.__pending.values():
+                changes[state].append(obj)
+        return changes
+
+    def is_dirty(self, obj):
+        """
+        Tells whether obj has changes that have not been saved yet.
+        """
+        key = "{}.{}".format(obj.__class__.__name__,
+                             getattr(obj, "id", None))
+        entry = self.__pending.get(key)
+        return entry is not None and entry[1] is obj
+
+    def compact(self):
+        """
+        Writes every object to the JSON file and empties the journal.
+        The JSON texts cached by unchanged objects are written as they are.
+        The file is written aside and then renamed over the old one, so a
+        crash leaves either the old or the new file, never a truncated one.
+        """
+        with self.__io, self.__locked(exclusive=True):
+            if self.__shared:
+                with self.__lock.write():
+                    self.__refresh()
+            self.__compact()
 
     def reload(self):
         """
-        Deserializes the JSON file to the __objects dictionary.
+        Deserializes the JSON file to the __objects dictionary one object
+        at a time, then replays the journal on top of it in journal mode.
+        Deferred classes are left out until first accessed.
         """
-        try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
-            for key in jo:
-                self.__objects[key] = class_map[jo[key]["__class__"]](**jo[key])
-        except:
-            pass
+        with self.__io, self.__locked(), self.__lock.write():
+            self.__read(set(class_map) - self.__deferred)
+
+    def refresh(self):
+        """
+        Brings the stored objects up to date with the JSON file and the
+        journal if they changed since this process last read or wrote
+        them. Only the records that changed are rebuilt, and only the new
+        tail of a journal that merely grew is read. Objects with unsaved
+        changes are kept as they are.
+        """
+        if self.__stamp(self.__file_path) == self.__file_seen and \
+                (not self.__journal or
+                 self.__stamp(self.__journal_path) == self.__journal_seen):
+            return
+        with self.__io, self.__locked(), self.__lock.write():
+            self.__refresh()
+
+    def __refresh(self):
+        """Reads what changed in the files, see refresh()"""
+        names = set(class_map) - self.__deferred
+        stamp = self.__stamp(self.__file_path)
+        if stamp is None:
+            return
+        if stamp != self.__file_seen:
+            self.__read(names, prune=True)
+        elif self.__journal:
+            stamp = self.__stamp(self.__journal_path)
+            seen = self.__journal_seen
+            if stamp == seen:
+                return
+            if stamp is None or seen is None or stamp[0] != seen[0] or \
+                    stamp[1] < self.__journal_offset:
+                self.__read(names, prune=True)
+            else:
+                FileStorage.__journal_seen = stamp
+                FileStorage.__journal_offset = self.__replay_journal(
+                    names, set(self.__pending), set(),
+                    self.__journal_offset)
 
     def delete(self, obj=None):
         """
         Removes an object from the __objects dictionary if it exists.
         """
-        if obj is not None:
-            key = obj.__class__.__name__ + '.' + obj.id
-            if key in self.__objects:
-                del self.__objects[key]
+        with self.__lock.write():
+            if obj is not None:
+                key = obj.__class__.__name__ + '.' + obj.id
+                if self.__objects.get(key) is obj:
+                    self.__remove(key)
+                    if self.__pending.get(key, ("dirty",))[0] == "new":
+                        del self.__pending[key]
+                    else:
+                        self.__pending[key] = ("deleted", obj)
 
     def close(self):
         """
-        Calls the reload() method to deserialize the JSON file to objects.
+        Calls the refresh() method, which reads the JSON file again only
+        when it changed since it was last read or written.
         """
-        self.reload()
+        self.refresh()
 
-    def get(self, cls, id):
+    def get(self, cls, id, load=None):
         """
-        Retrieves an object based on its class name and ID, or returns None if not found.
+        Retrieves an object based on its class (or class name) and ID,
+        or returns None if not found. load is ignored, see all().
         """
-        key = "{}.{}".format(cls, id)
-        if key in self.__objects.keys():
-            return self.__objects[key]
-        return None
+        name = self.__class_name(cls)
+        self.__require(name)
+        return self.__objects.get("{}.{}".format(name, id))
 
     def count(self, cls=None):
         """
-        Counts the number of objects in storage matching a given class name.
-        If no class name is provided, counts all objects in storage.
+        Counts the number of objects in storage matching a given class or
+        class name. If no class is provided, counts all objects in storage.
         """
         if cls:
-            counter = 0
-            for obj in self.__objects.values():
-                if obj.__class__.__name__ == cls:
-                    counter += 1
-            return counter
+            name = self.__class_name(cls)
+            self.__require(name)
+            return len(self.__classes.get(name, {}))
+        self.__require()
         return len(self.__objects)
 
+    def related(self, cls, attr, value):
+        """
+        Returns the list of objects of cls whose attribute attr equals
+        value, using the secondary index on that attribute.
+        """
+        cls = self.__class_name(cls)
+        self.__require(cls)
+        with self.__lock.read():
+            if attr not in indexed_fields.get(cls, ()):
+                return [obj for obj in self.__classes.get(cls, {}).values()
+                        if getattr(obj, attr, None) == value]
+            bucket = self.__indexes.get((cls, attr), {}).get(value, {})
+            return list(bucket.values())
+
+    def search_places(self, states=(), cities=(), amenities=(),
+                      limit=None, after=None):
+        """
+        Returns the places located in one of the given states or cities
+        (every place when neither is given) that offer all the given
+        amenities. Unknown amenity ids are ignored. When limit or after is
+        given the places are sorted by (created_at, id), start after the
+        (created_at, id) pair after and number at most limit.
+        """
+        self.__require("Amenity", "City", "Place")
+        amenities = [amenity_id for amenity_id in amenities
+                     if self.get(Amenity, amenity_id) is not None]
+        with self.__lock.read():
+            places = self.__search.search(states, cities, amenities)
+        if limit is None and after is None:
+            return places
+        places.sort(key=lambda place: (place.created_at, place.id))
+        if after is not None:
+            after = tuple(after)
+            places = [place for place in places
+                      if (place.created_at, place.id) > after]
+        return places if limit is None else places[:limit]
+
+    def snapshot(self, cls=None):
+        """
+        Returns a FileSnapshot of the objects of cls (a class or a class
+        name), or of every object if no class is given; other classes are
+        copied when the snapshot first reads them. Only the object order
+        and references are copied when it is taken, see __views().
+        """
+        names = [self.__class_name(cls)] if cls else list(class_map)
+        return FileSnapshot(self, self.__views, names)
+
+    def subscribe(self, listener):
+        """
+        Registers listener to be called as listener(obj, attr, old) every
+        time obj is stored, removed or has its attribute attr changed
+        from old (attr and old are None for stores and removals).
+        """
+        self.__listeners.append(listener)
+
+    def version(self, cls):
+        """
+        Returns a counter increased by every change to an object of cls.
+        """
+        name = self.__class_name(cls)
+        self.__require(name)
+        return self.__versions.get(name, (0,))[0]
+
+    def last_modified(self, cls):
+        """
+        Returns the time of the last change to an object of cls.
+        """
+        name = self.__class_name(cls)
+        self.__require(name)
+        return self.__versions.get(name, (0, self.__started))[1]
+
+    def stamp(self, cls):
+        """
+        Returns the (version, last_modified) pair of cls, see version() and
+        last_modified().
+        """
+        return self.version(cls), self.last_modified(cls)
+
+    def touch(self, obj, attr, old):
+        """
+        Marks obj dirty after its mapped attribute attr was changed from
+        old to its present value, keeping the secondary indexes current.
+        """
+        if attr.startswith("_"):
+            return
+        name = obj.__class__.__name__
+        key = "{}.{}".format(name, getattr(obj, "id", None))
+        if self.__objects.get(key) is not obj:
+            return
+        with self.__lock.write():
+            if self.__objects.get(key) is not obj:
+                return
+            if key not in self.__pending:
+                self.__pending[key] = ("dirty", obj)
+            self.__changed(obj, attr, old)
+            if attr == "created_at":
+                self.__order.pop(name, None)
+            self.__search.update(obj, attr)
+            if attr not in indexed_fields.get(name, ()):
+                return
+            bucket = self.__indexes.get((name, attr), {}).get(old)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self.__indexes[(name, attr)][old]
+            self.__indexes.setdefault((name, attr), {}).setdefault(
+                getattr(obj, attr, None), {})[key] = obj
+
+    def __put(self, obj):
+        """Stores obj under its key and indexes it, returning the key"""
+        key = obj.__class__.__name__ + "." + obj.id
+        old = self.__objects.get(key)
+        if old is obj:
+            return key
+        if old is not None:
+            self.__unindex(old, key)
+            self.__search.remove(old)
+        self.__objects[key] = obj
+        self.__classes.setdefault(obj.__class__.__name__, {})[key] = obj
+        self.__index(obj, key)
+        self.__search.add(obj)
+        if old is not None:
+            self.__changed(old)
+        self.__changed(obj)
+        order = self.__order.get(obj.__class__.__name__)
+        if order is not None:
+            if old is not None:
+                self.__unorder(order, old)
+            insort(order, (obj.created_at, obj.id))
+        return key
+
+    def __remove(self, key):
+        """Drops the object stored under key from every map and index"""
+        obj = self.__objects.pop(key, None)
+        if obj is not None:
+            self.__classes.get(obj.__class__.__name__, {}).pop(key, None)
+            self.__unindex(obj, key)
+            self.__search.remove(obj)
+            self.__changed(obj)
+            order = self.__order.get(obj.__class__.__name__)
+            if order is not None:
+                self.__unorder(order, obj)
+
+    def __changed(self, obj, attr=None, old=None):
+        """Records a change to obj and tells the listeners about it"""
+        name = obj.__class__.__name__
+        count = self.__versions.get(name, (0,))[0]
+        self.__versions[name] = (count + 1, datetime.utcnow())
+        for listener in self.__listeners:
+            listener(obj, attr, old)
+
+    def __ordered(self, name):
+        """Returns the (created_at, id) list of class name, sorted"""
+        order = self.__order.get(name)
+        if order is None:
+            order = sorted((obj.created_at, obj.id) for obj in
+                           self.__classes.get(name, {}).values())
+            self.__order[name] = order
+        return order
+
+    def __views(self, names):
+        """
+        Returns {class name: (order, objects)} for the classes names as
+        they are now, order being the sorted (created_at, id) list of the
+        class and objects its {<key>: object} partition. Both are copies
+        kept in __copies and handed out again until the class changes, so
+        they are never modified.
+        """
+        self.__require(*names)
+        views = {}
+        with self.__lock.read():
+            for name in names:
+                version = self.__versions.get(name, (0,))[0]
+                copy = self.__copies.get(name)
+                if copy is None or copy[0] != version:
+                    copy = (version, list(self.__ordered(name)),
+                            dict(self.__classes.get(name, {})))
+                    self.__copies[name] = copy
+                views[name] = copy[1:]
+        return views
+
+    def __unorder(self, order, obj):
+        """Removes the (created_at, id) entry of obj from order"""
+        entry = (obj.created_at, obj.id)
+        i = bisect_left(order, entry)
+        if i < len(order) and order[i] == entry:
+            del order[i]
+
+    def __filter(self, name, filters):
+        """Returns the objects of class name whose attributes equal
+        filters, going through a secondary index when one applies"""
+        objs = None
+        for attr, value in filters.items():
+            if attr in indexed_fields.get(name, ()):
+                objs = self.related(name, attr, value)
+                break
+        if objs is None:
+            objs = self.__classes.get(name, {}).values()
+        return [obj for obj in objs
+                if all(getattr(obj, attr, None) == value
+                       for attr, value in filters.items())]
+
+    def __write(self):
+        """Saves the pending changes to the journal or the JSON file"""
+        with self.__locked(exclusive=True):
+            if self.__shared:
+                with self.__lock.write():
+                    self.__refresh()
+            if self.__journal and path.isfile(self.__file_path):
+                if self.__append_journal() > self.__journal_limit:
+                    self.__compact()
+            else:
+                self.__compact()
+
+    def __compact(self):
+        """Writes the JSON file and resets the journal, see compact()"""
+        self.__require()
+        with self.__lock.write():
+            pending = self.__take_pending()
+            objs = list(self.__objects.items())
+        directory = path.dirname(path.abspath(self.__file_path))
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory,
+                                             prefix=".file.json.")
+            try:
+                os.fchmod(fd, self.__mode(self.__file_path))
+                with open(fd, 'w') as f:
+                    separator = "{"
+                    for key, obj in objs:
+                        f.write(separator + json.dumps(key) + ": " +
+                                obj.to_json(dump="Yes"))
+                        separator = ", "
+                    f.write("{}" if separator == "{" else "}")
+                    self.__flush(f)
+                os.replace(temp_path, self.__file_path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        except BaseException:
+            self.__restore_pending(pending)
+            raise
+        if self.__fsync != "never":
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        FileStorage.__file_seen = self.__stamp(self.__file_path)
+        if self.__journal:
+            self.__reset_journal()
+
+    def __append_journal(self):
+        """Appends the pending changes to the journal as JSON lines and
+        returns the resulting journal size"""
+        with self.__lock.write():
+            pending = self.__take_pending()
+        lines = []
+        for key, (state, obj) in pending.items():
+            if state == "deleted":
+                lines.append('{{"key": {}}}\n'.format(json.dumps(key)))
+            else:
+                text = obj.to_json(dump="Yes")
+                lines.append('{{"key": {}, "value": {}}}\n'.format(
+                    json.dumps(key), text))
+        if not lines:
+            return 0
+        before = self.__stamp(self.__journal_path)
+        if before is None or before[1] == 0:
+            lines.insert(0, self.__journal_header())
+        try:
+            with open(self.__journal_path, 'a') as f:
+                f.writelines(lines)
+                self.__flush(f)
+                size = f.tell()
+        except BaseException:
+            self.__restore_pending(pending)
+            raise
+        if before == self.__journal_seen:
+            # nobody else wrote to the journal since it was last read
+            FileStorage.__journal_seen = self.__stamp(self.__journal_path)
+            FileStorage.__journal_offset = size
+        return size
+
+    def __take_pending(self):
+        """Returns the pending changes and starts a new empty set of them,
+        the write lock being held"""
+        pending = dict(self.__pending)
+        self.__pending.clear()
+        return pending
+
+    def __restore_pending(self, pending):
+        """Puts back the pending changes of a failed write, unless newer
+        changes of the same objects were made since"""
+        with self.__lock.write():
+            for key, entry in pending.items():
+                self.__pending.setdefault(key, entry)
+
+    def __require(self, *names):
+        """Loads the deferred classes among names, or all of them"""
+        if not self.__deferred or names and \
+                not any(name in self.__deferred for name in names):
+            return
+        with self.__io, self.__locked(), self.__lock.write():
+            names = self.__deferred.intersection(names or self.__deferred)
+            if names:
+                self.__deferred.difference_update(names)
+                self.__read(names, fresh=True)
+
+    def __read(self, names, fresh=False, prune=False):
+        """Loads the objects of the classes names from the JSON file and
+        the journal. Objects already in memory are kept when fresh and
+        those with unsaved changes when pruning; when pruning, the saved
+        ones missing from both files are dropped."""
+        skip = set()
+        if fresh or prune:
+            skip.update(key for key in self.__pending
+                        if key.partition(".")[0] in names)
+        if fresh:
+            for name in names:
+                skip.update(self.__classes.get(name, ()))
+        file_stamp = self.__stamp(self.__file_path)
+        journal_stamp = self.__stamp(self.__journal_path)
+        found = set()
+        complete = False
+        try:
+            with open(self.__file_path, 'r') as f:
+                # an empty file holds no objects
+                members = iter_members(f) if f.read(1) else ()
+                f.seek(0)
+                for key, value, text in members:
+                    if key.partition(".")[0] in names and key not in skip:
+                        found.add(key)
+                        self.__load(key, value, text)
+            complete = True
+        except FileNotFoundError:
+            pass
+        offset = 0
+        if self.__journal:
+            base = None if file_stamp is None else list(file_stamp[1:])
+            offset = self.__replay_journal(names, skip, found, base=base)
+            if offset is None:
+                # the journal was already folded into the file
+                offset = 0
+                if not fresh:
+                    self.__reset_journal()
+                    journal_stamp = self.__journal_seen
+                    offset = self.__journal_offset
+        if not fresh:
+            FileStorage.__file_seen = file_stamp
+            FileStorage.__journal_seen = journal_stamp
+            FileStorage.__journal_offset = offset
+        if prune and complete:
+            for name in names:
+                for key in list(self.__classes.get(name, ())):
+                    if key not in found and key not in self.__pending:
+                        self.__remove(key)
+
+    def __load(self, key, value, text):
+        """Builds the object serialized as value (JSON text text) and stores
+        it, unless the stored object already serializes to text. The built
+        object keeps text as its cached JSON text."""
+        if key not in self.__pending and key in self.__objects and \
+                self.__objects[key].to_json(dump="Yes") == text:
+            return
+        obj = class_map[value["__class__"]](**value)
+        if all(name in value for name in ("id", "created_at", "updated_at")):
+            obj._keep_json(text)
+        self.__put(obj)
+
+    def __replay_journal(self, names, skip, found, offset=0, base=None):
+        """Applies the journal entries of the classes names found past the
+        byte offset on top of the loaded objects, leaving out the keys in
+        skip, and returns the offset of the first entry not applied. The
+        keys of the objects it leaves stored are added to found. Returns
+        None, applying nothing, if the journal header names another base
+        file than base, the [size, mtime] of the JSON file."""
+        try:
+            with open(self.__journal_path, 'rb') as f:
+                f.seek(offset)
+                for line in iter(f.readline, b""):
+                    if not line.endswith(b"\n"):
+                        # write still going on or torn at the tail
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # torn write at the tail of the journal
+                        break
+                    offset += len(line)
+                    if "base" in entry:
+                        if base is not None and entry["base"] != base:
+                            return None
+                        continue
+                    key = entry["key"]
+                    if key.partition(".")[0] not in names or key in skip:
+                        continue
+                    if "value" in entry:
+                        found.add(key)
+                        self.__load(key, entry["value"],
+                                    self.__entry_text(line, key, entry))
+                    else:
+                        found.discard(key)
+                        self.__remove(key)
+        except FileNotFoundError:
+            pass
+        return offset
+
+    def __entry_text(self, line, key, entry):
+        """Returns the JSON text of the value of the journal entry read as
+        line, sliced out of line when it is laid out as written"""
+        head = '{{"key": {}, "value": '.format(json.dumps(key)).encode()
+        if line.startswith(head) and line.endswith(b"}\n"):
+            return line[len(head):-2].decode()
+        return json.dumps(entry["value"])
+
+    def __journal_header(self):
+        """Returns the first line of a journal applying to the JSON file
+        as it is now, naming it by its size and modification time"""
+        stamp = self.__stamp(self.__file_path)
+        return '{{"base": {}}}\n'.format(json.dumps(list(stamp[1:])))
+
+    def __reset_journal(self):
+        """Empties the journal, leaving only its header"""
+        with open(self.__journal_path, 'w') as f:
+            f.write(self.__journal_header())
+            self.__flush(f)
+            FileStorage.__journal_offset = f.tell()
+        FileStorage.__journal_seen = self.__stamp(self.__journal_path)
+
+    @contextmanager
+    def __locked(self, exclusive=False):
+        """Holds the lock on __lock_path within a with block when the files
+        are shared, __io being held; nested uses keep the outer lock"""
+        if not self.__shared or self.__file_locked:
+            yield
+            return
+        with open(self.__lock_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            FileStorage.__file_locked = True
+            try:
+                yield
+            finally:
+                FileStorage.__file_locked = False
+
+    def __flush(self, f):
+        """Forces what was written to the open file f to disk, unless the
+        fsync policy is never"""
+        if self.__fsync != "never":
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __mode(self, file_path):
+        """Returns the permission bits of a file, or the ones open() gives
+        a new file under the umask of the process if it is missing"""
+        try:
+            return stat(file_path).st_mode & 0o7777
+        except FileNotFoundError:
+            umask = os.umask(0o022)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    def __stamp(self, file_path):
+        """Returns the (inode, size, mtime) of a file, None if missing"""
+        try:
+            st = stat(file_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def __class_name(self, cls):
+        """Returns the class name for a class object or a class name"""
+        if isinstance(cls, str):
+            return cls
+        return cls.__name__
+
+    def __index(self, obj, key):
+        """Adds obj to every secondary index declared for its class"""
+        name = obj.__class__.__name__
+        for attr in indexed_fields.get(name, ()):
+            self.__indexes.setdefault((name, attr), {}).setdefault(
+                getattr(obj, attr, None), {})[key] = obj
+
+    def __unindex(self, obj, key):
+        """Removes obj from every secondary index declared for its class"""
+        name = obj.__class__.__name__
+        for attr in indexed_fields.get(name, ()):
+            index = self.__indexes.get((name, attr), {})
+            value = getattr(obj, attr, None)
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del index[value]
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+"""
+Contains the functions comparing the indexes of the live database with
+the ones the models declare
+"""
+from collections import namedtuple
+from sqlalchemy import and_, inspect, select
+from sqlalchemy.schema import CreateIndex
+
+# One problem found by audit(): the table concerned, what is wrong and
+# the statement fixing it or the query plan showing it
+Finding = namedtuple("Finding", ["table", "problem", "detail"])
+
+
+def live_indexes(engine):
+    """Returns a dictionary mapping every table of the database to the
+    column tuples of its primary key, unique constraints and indexes"""
+    inspector = inspect(engine)
+    indexes = {}
+    for table in inspector.get_table_names():
+        pk = inspector.get_pk_constraint(table)["constrained_columns"]
+        columns = [tuple(pk)]
+        columns.extend(tuple(unique["column_names"]) for unique
+                       in inspector.get_unique_constraints(table))
+        columns.extend(tuple(index["column_names"]) for index
+                       in inspector.get_indexes(table))
+        indexes[table] = columns
+    return indexes
+
+
+def covered(columns, indexes):
+    """Tells whether one of indexes, column tuples, starts with columns"""
+    return any(index[:len(columns)] == columns for index in indexes)
+
+
+def missing_indexes(engine, metadata):
+    """
+    Returns the Findings of the indexes metadata declares that no index of
+    the database starts with, and of the foreign keys no index of either
+    starts with, along with the statement creating the missing index.
+    """
+    live = live_indexes(engine)
+    findings = []
+    for table in metadata.sorted_tables:
+        if table.name not in live:
+            continue
+        declared = [tuple(column.name for column in table.primary_key)]
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            columns = tuple(column.name for column in index.columns)
+            declared.append(columns)
+            if not covered(columns, live[table.name]):
+                findings.append(Finding(
+                    table.name, "missing index {} ({})".format(
+                        index.name, ", ".join(columns)),
+                    str(CreateIndex(index).compile(
+                        dialect=engine.dialect)).strip()))
+        for key in table.foreign_key_constraints:
+            columns = tuple(key.column_keys)
+            if not covered(columns, live[table.name] + declared):
+                findings.append(Finding(
+                    table.name, "unindexed foreign key ({})".format(
+                        ", ".join(columns)),
+                    "CREATE INDEX ix_{0}_{1} ON {0} ({2})".format(
+                        table.name, "_".join(columns), ", ".join(columns))))
+    return findings
+
+
+def access_paths(metadata):
+    """
+    Returns the queries following the foreign keys and the declared
+    indexes of metadata: rows of a table whose foreign key, or the leading
+    column of an index, equals a value, ordered by the other columns of
+    the index.
+    """
+    paths = []
+    for table in metadata.sorted_tables:
+        shapes = [(tuple(key.column_keys), ())
+                  for key in table.foreign_key_constraints]
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            columns = tuple(column.name for column in index.columns)
+            shapes.append((columns[:1], columns[1:]))
+        for shape in sorted(set(shapes), key=shapes.index):
+            where, order = shape
+            paths.append(select(table).where(and_(
+                *(table.c[name] == "" for name in where))).order_by(
+                    *(table.c[name] for name in order)))
+    return paths
+
+
+def explain(engine, query):
+    """
+    Returns the steps of the plan the database chooses for query as
+    (description, slow) pairs, slow telling whether the step reads a whole
+    table or index or sorts the rows itself. Only SQLite and MySQL are
+    understood; other databases answer an empty plan.
+    """
+    sql = str(query.compile(dialect=engine.dialect,
+                            compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            return [(row[-1], row[-1].startswith("SCAN") or
+                     "TEMP B-TREE" in row[-1]) for row in
+                    connection.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+        if engine.dialect.name == "mysql":
+            return [("{table}: type={type} key={key} rows={rows} {Extra}"
+                     .format(**row), row["type"] in ("ALL", "index") or
+                     "filesort" in (row["Extra"] or "")) for row in
+                    connection.exec_driver_sql("EXPLAIN " + sql).mappings()]
+    return []
+
+
+def slow_paths(engine, metadata):
+    """Returns the Findings of the access_paths() of metadata the database
+    runs with a slow step, holding the step"""
+    live = inspect(engine).get_table_names()
+    findings = []
+    for query in access_paths(metadata):
+        table = query.get_final_froms()[0].name
+        if table not in live:
+            continue
+        for step, slow in explain(engine, query):
+            if slow:
+                findings.append(Finding(table, "slow access path {}".format(
+                    " ".join(str(query.compile(
+                        dialect=engine.dialect)).split())), step))
+    return findings
+
+
+def audit(engine, metadata):
+    """Returns the Findings of missing_indexes() and slow_paths() comparing
+    the database of engine with metadata"""
+    return missing_indexes(engine, metadata) + slow_paths(engine, metadata)
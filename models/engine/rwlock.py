@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""
+Contains the ReadWriteLock class guarding the FileStorage maps
+"""
+from contextlib import contextmanager
+import threading
+
+
+class ReadWriteLock:
+    """
+    Lock held by any number of readers at once or by a single writer.
+    Readers never wait for each other, only for a writer holding the lock
+    or waiting for it, so a stream of readers cannot starve the writers.
+    Both sides are reentrant and the writer may also read, but a reader
+    cannot become a writer without releasing the lock first.
+    """
+
+    def __init__(self):
+        """Creates an unlocked lock"""
+        self.__cond = threading.Condition(threading.Lock())
+        # int - threads holding the lock for reading
+        self.__readers = 0
+        # int - threads waiting to write
+        self.__waiting = 0
+        # int - thread identifier of the writer, None when not written
+        self.__writer = None
+        # int - nesting depth of the writer
+        self.__depth = 0
+        # threading.local - nesting depth of the reads of each thread
+        self.__local = threading.local()
+
+    @contextmanager
+    def read(self):
+        """Holds the lock for reading within a with block"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """Holds the lock for writing within a with block"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def acquire_read(self):
+        """Waits until no writer holds or waits for the lock, then reads"""
+        if self.__writer == threading.get_ident():
+            return
+        depth = getattr(self.__local, "depth", 0)
+        if not depth:
+            with self.__cond:
+                while self.__writer is not None or self.__waiting:
+                    self.__cond.wait()
+                self.__readers += 1
+        self.__local.depth = depth + 1
+
+    def release_read(self):
+        """Releases one read of the current thread"""
+        if self.__writer == threading.get_ident():
+            return
+        self.__local.depth -= 1
+        if not self.__local.depth:
+            with self.__cond:
+                self.__readers -= 1
+                if not self.__readers:
+                    self.__cond.notify_all()
+
+    def acquire_write(self):
+        """Waits until nobody else holds the lock, then writes"""
+        me = threading.get_ident()
+        if self.__writer == me:
+            self.__depth += 1
+            return
+        if getattr(self.__local, "depth", 0):
+            raise RuntimeError("cannot write while holding a read lock")
+        with self.__cond:
+            self.__waiting += 1
+            try:
+                while self.__writer is not None or self.__readers:
+                    self.__cond.wait()
+            finally:
+                self.__waiting -= 1
+            self.__writer = me
+            self.__depth = 1
+
+    def release_write(self):
+        """Releases one write of the current thread"""
+        self.__depth -= 1
+        if not self.__depth:
+            with self.__cond:
+                self.__writer = None
+                self.__cond.notify_all()
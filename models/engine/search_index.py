@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+"""
+Contains the PlaceSearchIndex class used to answer places_search queries
+"""
+
+
+class PlaceSearchIndex:
+    """
+    Inverted index over places, kept current by the storage engine.
+    Every indexed place owns a bit; cities and amenities map to the
+    bitset of their places, so a search is a handful of integer ORs and
+    ANDs over precomputed postings.
+    """
+
+    def __init__(self):
+        """Creates an empty index"""
+        # list - bit number -> Place object, None for a free bit
+        self.__places = []
+        # list - bit numbers of removed places, reused first
+        self.__free = []
+        # dictionary - place id -> (bit, city id, tuple of amenity ids)
+        self.__slots = {}
+        # int - bitset of every indexed place
+        self.__everything = 0
+        # dictionary - city id -> bitset of its places
+        self.__by_city = {}
+        # dictionary - amenity id -> bitset of the places offering it
+        self.__by_amenity = {}
+        # dictionary - city id -> state id
+        self.__city_state = {}
+        # dictionary - state id -> set of city ids
+        self.__by_state = {}
+
+    def add(self, obj):
+        """Indexes a Place or a City"""
+        name = obj.__class__.__name__
+        if name == "Place":
+            self.__add_place(obj)
+        elif name == "City":
+            self.__add_city(obj)
+
+    def remove(self, obj):
+        """Removes a Place or a City from the index"""
+        name = obj.__class__.__name__
+        if name == "Place":
+            self.__remove_place(obj.id)
+        elif name == "City":
+            self.__remove_city(obj.id)
+
+    def update(self, obj, attr):
+        """Reindexes obj after its attribute attr was changed"""
+        name = obj.__class__.__name__
+        if name == "Place" and attr in ("city_id", "amenity_ids"):
+            self.__remove_place(obj.id)
+            self.__add_place(obj)
+        elif name == "City" and attr == "state_id":
+            self.__remove_city(obj.id)
+            self.__add_city(obj)
+
+    def search(self, states=(), cities=(), amenities=()):
+        """
+        Returns the places located in one of the given states or cities
+        (every place when neither is given) that offer all the amenities.
+        """
+        if not states and not cities:
+            bits = self.__everything
+        else:
+            city_ids = set(cities)
+            for state_id in states:
+                city_ids.update(self.__by_state.get(state_id, ()))
+            bits = 0
+            for city_id in city_ids:
+                bits |= self.__by_city.get(city_id, 0)
+        for amenity_id in amenities:
+            if not bits:
+                break
+            bits &= self.__by_amenity.get(amenity_id, 0)
+        return self.__decode(bits)
+
+    def __decode(self, bits):
+        """Returns the places whose bits are set in bits"""
+        places = self.__places
+        digits = bin(bits)[:1:-1]
+        result = []
+        bit = digits.find("1")
+        while bit != -1:
+            result.append(places[bit])
+            bit = digits.find("1", bit + 1)
+        return result
+
+    def __add_place(self, place):
+        """Gives place a bit and sets it in its city and amenities"""
+        if place.id in self.__slots:
+            self.__remove_place(place.id)
+        if self.__free:
+            bit = self.__free.pop()
+            self.__places[bit] = place
+        else:
+            bit = len(self.__places)
+            self.__places.append(place)
+        amenity_ids = tuple(getattr(place, "amenity_ids", None) or ())
+        self.__slots[place.id] = (bit, place.city_id, amenity_ids)
+        mask = 1 << bit
+        self.__everything |= mask
+        self.__by_city[place.city_id] = \
+            self.__by_city.get(place.city_id, 0) | mask
+        for amenity_id in amenity_ids:
+            self.__by_amenity[amenity_id] = \
+                self.__by_amenity.get(amenity_id, 0) | mask
+
+    def __remove_place(self, place_id):
+        """Clears the bit of a place everywhere and frees it"""
+        slot = self.__slots.pop(place_id, None)
+        if slot is None:
+            return
+        bit, city_id, amenity_ids = slot
+        mask = 1 << bit
+        self.__everything &= ~mask
+        self.__clear(self.__by_city, city_id, mask)
+        for amenity_id in amenity_ids:
+            self.__clear(self.__by_amenity, amenity_id, mask)
+        self.__places[bit] = None
+        self.__free.append(bit)
+
+    def __clear(self, postings, key, mask):
+        """Clears mask in postings[key], dropping the key once empty"""
+        bits = postings.get(key, 0) & ~mask
+        if bits:
+            postings[key] = bits
+        else:
+            postings.pop(key, None)
+
+    def __add_city(self, city):
+        """Records the state a city belongs to"""
+        self.__city_state[city.id] = city.state_id
+        self.__by_state.setdefault(city.state_id, set()).add(city.id)
+
+    def __remove_city(self, city_id):
+        """Forgets the state a city belonged to"""
+        state_id = self.__city_state.pop(city_id, None)
+        cities = self.__by_state.get(state_id)
+        if cities is not None:
+            cities.discard(city_id)
+            if not cities:
+                del self.__by_state[state_id]
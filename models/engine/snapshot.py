@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""
+Contains the Snapshot class, a read-only view of the stored objects
+"""
+from collections import namedtuple
+
+# One object as it was when a snapshot read it: its creation time, its id
+# and the JSON text of its to_dict()
+Record = namedtuple("Record", ["created_at", "id", "text"])
+# Number of objects a stream reads and serializes at a time
+PAGE_SIZE = 500
+
+
+class Snapshot:
+    """
+    Read-only view of the stored objects handing out Records, which keep
+    the objects as they were when read. Each storage provides its own
+    snapshots, see FileStorage.snapshot() and DBStorage.snapshot().
+    """
+
+    def __enter__(self):
+        """Returns the snapshot itself"""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Closes the snapshot"""
+        self.close()
+
+    def close(self):
+        """Releases what the snapshot holds"""
+
+    def records(self, cls, limit=None, after=None, **filters):
+        """
+        Returns the list of Records of the objects of cls whose attributes
+        equal filters, in (created_at, id) order, starting after the
+        (created_at, id) pair after and holding at most limit Records.
+        """
+        raise NotImplementedError
+
+    def stream(self, cls, **filters):
+        """Yields the Records of records(cls, **filters), then closes the
+        snapshot, also when the generator is closed before the end"""
+        try:
+            for record in self.records(cls, **filters):
+                yield record
+        finally:
+            self.close()
+
+    def stream_all(self, cls, ids):
+        """Yields the Records of get_all(cls, ids), reading PAGE_SIZE of
+        them at a time, then closes the snapshot, also when the generator
+        is closed before the end"""
+        try:
+            ids = list(ids)
+            for start in range(0, len(ids), PAGE_SIZE):
+                for record in self.get_all(cls, ids[start:start + PAGE_SIZE]):
+                    yield record
+        finally:
+            self.close()
+
+    def get(self, cls, id):
+        """Returns the Record of the object of cls with id, or None"""
+        records = self.get_all(cls, [id])
+        return records[0] if records else None
+
+    def get_all(self, cls, ids):
+        """Returns the Records of the objects of cls with the given ids,
+        in the order of ids, leaving out the ids of missing objects"""
+        raise NotImplementedError
+
+    def count(self, cls=None):
+        """Returns the number of objects of cls, or of every object"""
+        raise NotImplementedError
+
+    def search_places(self, states=(), cities=(), amenities=(),
+                      limit=None, after=None):
+        """Returns the ids of the places the storage search_places() finds
+        with the same arguments, among the places the snapshot sees"""
+        raise NotImplementedError
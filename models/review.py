@@ -4,15 +4,19 @@ import models
 from models.base_model import BaseModel, Base
 from os import getenv
 import sqlalchemy
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 
 
 class Review(BaseModel, Base):
     """Representation of Review """
     if models.storage_t == 'db':
         __tablename__ = 'reviews'
+        # the reviews of a place in creation order, also indexing place_id
+        __table_args__ = (Index('ix_reviews_place_id_created_at',
+                                'place_id', 'created_at'),)
         place_id = Column(String(60), ForeignKey('places.id'), nullable=False)
-        user_id = Column(String(60), ForeignKey('users.id'), nullable=False)
+        user_id = Column(String(60), ForeignKey('users.id'), nullable=False,
+                         index=True)
         text = Column(String(1024), nullable=False)
     else:
         place_id = ""
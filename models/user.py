@@ -12,7 +12,7 @@ class User(BaseModel, Base):
     """Representation of a user """
     if models.storage_t == 'db':
         __tablename__ = 'users'
-        email = Column(String(128), nullable=False)
+        email = Column(String(128), nullable=False, index=True)
         password = Column(String(128), nullable=False)
         first_name = Column(String(128), nullable=True)
         last_name = Column(String(128), nullable=True)
@@ -27,3 +27,16 @@ class User(BaseModel, Base):
     def __init__(self, *args, **kwargs):
         """initializes user"""
         super().__init__(*args, **kwargs)
+
+    if models.storage_t != 'db':
+        @property
+        def places(self):
+            """getter for list of place instances owned by the user"""
+            from models.place import Place
+            return models.storage.related(Place, "user_id", self.id)
+
+        @property
+        def reviews(self):
+            """getter for list of review instances written by the user"""
+            from models.review import Review
+            return models.storage.related(Review, "user_id", self.id)
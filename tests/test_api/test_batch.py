@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+"""
+Contains the TestBatch class
+"""
+
+from api.v1.app import app
+from api.v1.views import batch
+import models
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+import pep8
+import unittest
+from unittest import mock
+
+
+class TestBatch(unittest.TestCase):
+    """Test the batch creation and update views"""
+    def setUp(self):
+        """Stores a user and a city in a state"""
+        self.client = app.test_client()
+        self.user = User(email="batch@hbnb.io", password="pwd")
+        self.state = State(name="Batch")
+        self.city = City(name="Batch", state_id=self.state.id)
+        models.storage.bulk_new([self.user, self.state, self.city])
+
+    def tearDown(self):
+        """Removes the stored objects"""
+        models.storage.close()
+        for cls in (Place, City, State):
+            for obj in models.storage.all(cls, name="Batch").values():
+                obj.delete()
+            for obj in models.storage.all(cls, name="Created").values():
+                obj.delete()
+        obj = models.storage.get(User, self.user.id)
+        if obj is not None:
+            obj.delete()
+        models.storage.save()
+
+    def test_pep8_conformance_batch(self):
+        """Test that api/v1/views/batch.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/batch.py',
+                                    'tests/test_api/test_batch.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def created(self, cls):
+        """Returns the number of stored objects of cls named Created"""
+        models.storage.close()
+        return len(models.storage.all(cls, name="Created"))
+
+    def test_create(self):
+        """Test that created objects get ids and times of their own and
+        leave the object whose id they carry alone"""
+        response = self.client.post("/api/v1/states/batch", json=[
+            {"name": "Created", "id": self.state.id,
+             "created_at": "2000-01-01T00:00:00.000000"},
+            {"name": "Created"}])
+        self.assertEqual(response.status_code, 201)
+        ids = [state["id"] for state in response.get_json()]
+        self.assertNotIn(self.state.id, ids)
+        self.assertEqual(len(set(ids)), 2)
+        models.storage.close()
+        state = models.storage.get(State, self.state.id)
+        self.assertEqual(state.name, "Batch")
+        self.assertEqual(state.created_at, self.state.created_at)
+        self.assertEqual(self.created(State), 2)
+
+    def test_all_or_nothing(self):
+        """Test that nothing is created when one object is invalid"""
+        response = self.client.post("/api/v1/states/batch", json=[
+            {"name": "Created"}, {"name": ""}])
+        self.assertEqual(response.status_code, 400)
+        url = "/api/v1/cities/{}/places/batch".format(self.city.id)
+        response = self.client.post(url, json=[
+            {"name": "Created", "user_id": self.user.id},
+            {"name": "Created", "user_id": "missing"}])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.created(State), 0)
+        self.assertEqual(self.created(Place), 0)
+
+    def test_unknown_parent(self):
+        """Test that a batch under a missing parent gets a 404 answer"""
+        response = self.client.post(
+            "/api/v1/states/missing/cities/batch", json=[{"name": "Created"}])
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(
+            "/api/v1/cities/missing/places/batch",
+            json=[{"name": "Created", "user_id": self.user.id}])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.created(City), 0)
+        self.assertEqual(self.created(Place), 0)
+
+    def test_too_large(self):
+        """Test that a batch over MAX_BATCH_SIZE gets a 400 answer"""
+        with mock.patch.object(batch, "MAX_BATCH_SIZE", 2):
+            response = self.client.post("/api/v1/states/batch", json=[
+                {"name": "Created"} for i in range(3)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.created(State), 0)
+
+    def test_update_ignored(self):
+        """Test that an update leaves the ignored keys alone"""
+        response = self.client.put("/api/v1/cities/batch", json=[
+            {"id": self.city.id, "name": "Created", "state_id": "other",
+             "created_at": "2000-01-01T00:00:00.000000"},
+            {"id": "missing", "name": "Created"}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([city["id"] for city in response.get_json()],
+                         [self.city.id])
+        models.storage.close()
+        city = models.storage.get(City, self.city.id)
+        self.assertEqual(city.name, "Created")
+        self.assertEqual(city.state_id, self.state.id)
+        self.assertEqual(city.created_at, self.city.created_at)
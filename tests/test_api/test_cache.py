@@ -0,0 +1,169 @@
+#!/usr/bin/python3
+"""
+Contains the TestLRUCache, TestResponseCache and TestCachedViews classes
+"""
+
+from api.v1.app import app
+from api.v1.views import cache
+from api.v1.views.cache import LRUCache, ResponseCache, response_cache, tee
+import models
+from models.city import City
+from models.state import State
+import pep8
+import unittest
+from unittest import mock
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test the in-process backend of the response cache"""
+    def test_pep8_conformance_cache(self):
+        """Test that api/v1/views/cache.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/cache.py',
+                                    'tests/test_api/test_cache.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        cache.delete("a")
+        self.assertIsNone(cache.get("a"))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_ttl(self):
+        """Test that expired entries are dropped when read"""
+        cache = LRUCache(ttl=-1)
+        cache.set("a", 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test the tag invalidation of the response cache"""
+    def setUp(self):
+        """Creates a response cache on an LRUCache"""
+        self.cache = ResponseCache(LRUCache())
+        self.state = State(name="CA")
+        self.city = City(name="SF", state_id="s1")
+
+    def store(self, key, *tags):
+        """Caches key under tags at the current generation"""
+        self.cache.store(key, key, tags, self.cache.generation)
+
+    def test_class_and_id(self):
+        """Test that a change drops the entries of its class and id"""
+        self.store("states", ("State",))
+        self.store("state", ("State", "id", self.state.id))
+        self.store("other", ("State", "id", "other"))
+        self.store("cities", ("City",))
+        self.cache.invalidate(self.state)
+        self.assertIsNone(self.cache.lookup("states"))
+        self.assertIsNone(self.cache.lookup("state"))
+        self.assertEqual(self.cache.lookup("other"), "other")
+        self.assertEqual(self.cache.lookup("cities"), "cities")
+        self.assertEqual(self.cache.stats()["invalidations"], 2)
+
+    def test_parent(self):
+        """Test that a child drops the entries of its parent, of the parent
+        it was moved from, and of no other parent"""
+        self.store("s1", ("City", "state_id", "s1"))
+        self.store("s2", ("City", "state_id", "s2"))
+        self.store("s3", ("City", "state_id", "s3"))
+        self.city.state_id = "s2"
+        self.cache.invalidate(self.city, "state_id", "s1")
+        self.assertIsNone(self.cache.lookup("s1"))
+        self.assertIsNone(self.cache.lookup("s2"))
+        self.assertEqual(self.cache.lookup("s3"), "s3")
+
+    def test_stale_generation(self):
+        """Test that an entry rendered before a change is not stored"""
+        generation = self.cache.generation
+        self.cache.invalidate(self.state)
+        self.cache.store("states", "states", [("State",)], generation)
+        self.assertIsNone(self.cache.lookup("states"))
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+
+class TestCachedViews(unittest.TestCase):
+    """Test the cached decorator on the views"""
+    def setUp(self):
+        """Stores a state and empties the response cache"""
+        self.client = app.test_client()
+        self.state = State(name="Cached")
+        models.storage.new(self.state)
+        models.storage.save()
+        response_cache.backend.clear()
+        self.url = "/api/v1/states"
+
+    def tearDown(self):
+        """Removes the stored states"""
+        models.storage.close()
+        for state in models.storage.all(State, name="Cached").values():
+            state.delete()
+        models.storage.save()
+
+    def entry(self, url):
+        """Returns the cache entry of url, without counting a lookup"""
+        return response_cache.backend.get(url + "?")
+
+    def test_tee(self):
+        """Test that tee passes on the whole body unless it is too long"""
+        bodies = []
+        self.assertEqual(list(tee(iter(["[", b"1", "]"]), bodies.append)),
+                         [b"[", b"1", b"]"])
+        self.assertEqual(bodies, [b"[1]"])
+        with mock.patch.object(cache, "MAX_BODY_SIZE", 2):
+            self.assertEqual(len(list(tee(iter(["[", "1", "]"]),
+                                          bodies.append))), 3)
+        self.assertEqual(bodies, [b"[1]"])
+
+    def test_streamed(self):
+        """Test that a streamed body is cached once fully sent only"""
+        response = self.client.get(self.url, buffered=False)
+        self.assertTrue(response.is_streamed)
+        response.close()
+        self.assertIsNone(self.entry(self.url))
+        body = self.client.get(self.url).get_data()
+        self.assertEqual(self.entry(self.url)[1], body)
+        hits = response_cache.hits
+        self.assertEqual(self.client.get(self.url).get_data(), body)
+        self.assertEqual(response_cache.hits, hits + 1)
+
+    def test_not_modified(self):
+        """Test that a 304 answer is not cached and that a cache hit is
+        answered 304 when the client copy is current"""
+        etag = self.client.get(self.url).headers["ETag"]
+        response_cache.backend.clear()
+        response = self.client.get(self.url,
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertIsNone(self.entry(self.url))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        response.get_data()
+        hits = response_cache.hits
+        response = self.client.get(self.url,
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response_cache.hits, hits + 1)
+
+    def test_stats_invalidated(self):
+        """Test that /stats is rendered again after a POST"""
+        url = "/api/v1/stats"
+        states = self.client.get(url).get_json()["states"]
+        self.assertIsNotNone(self.entry(url))
+        response = self.client.post(self.url, json={"name": "Cached"})
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(self.entry(url))
+        self.assertEqual(self.client.get(url).get_json()["states"],
+                         states + 1)
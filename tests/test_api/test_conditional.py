@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""
+Contains the TestConditional class
+"""
+
+from api.v1.app import app
+import models
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+import pep8
+import unittest
+
+
+class TestConditional(unittest.TestCase):
+    """Test the conditional GETs of single objects"""
+    def setUp(self):
+        """Stores a place in a state and an amenity"""
+        self.client = app.test_client()
+        self.user = User(email="etag@hbnb.io", password="pwd")
+        self.state = State(name="CA")
+        self.city = City(name="SF", state_id=self.state.id)
+        self.place = Place(name="Home", city_id=self.city.id,
+                           user_id=self.user.id)
+        self.amenity = Amenity(name="Wifi")
+        models.storage.bulk_new([self.user, self.state, self.city,
+                                 self.place, self.amenity])
+
+    def test_pep8_conformance_test_conditional(self):
+        """Test that tests/test_api/test_conditional.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_api/test_conditional.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def revalidate(self, url, change):
+        """Gets url, runs change, then gets url again with the first ETag
+        and returns both responses"""
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        change()
+        second = self.client.get(url, headers={"If-None-Match":
+                                               first.headers["ETag"]})
+        self.assertNotEqual(first.headers["ETag"], second.headers["ETag"])
+        return first, second
+
+    def test_get_after_put(self):
+        """Test that an updated object is sent again, not a 304"""
+        url = "/api/v1/states/{}".format(self.state.id)
+
+        def change():
+            """Renames the state"""
+            response = self.client.put(url, json={"name": "NV"})
+            self.assertEqual(response.status_code, 200)
+        first, second = self.revalidate(url, change)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.get_json()["name"], "NV")
+        third = self.client.get(url, headers={"If-None-Match":
+                                              second.headers["ETag"]})
+        self.assertEqual(third.status_code, 304)
+
+    def test_get_after_link(self):
+        """Test that linking an amenity changes the ETag of the place"""
+        url = "/api/v1/places/{}".format(self.place.id)
+
+        def change():
+            """Links the amenity to the place"""
+            response = self.client.post("{}/amenities/{}".format(
+                url, self.amenity.id))
+            self.assertEqual(response.status_code, 201)
+        first, second = self.revalidate(url, change)
+        self.assertEqual(second.status_code, 200)
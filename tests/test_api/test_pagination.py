@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""
+Contains the TestPagination class
+"""
+
+from api.v1.app import app
+from api.v1.views.pagination import decode_cursor, encode_cursor
+import base64
+from datetime import datetime
+import json
+import models
+from models.city import City
+from models.state import State
+import pep8
+import unittest
+from werkzeug.exceptions import BadRequest
+
+
+class TestPagination(unittest.TestCase):
+    """Test the keyset pagination of the collection views"""
+    def setUp(self):
+        """Stores a state with five cities"""
+        self.client = app.test_client()
+        self.state = State(name="Paged")
+        self.cities = [City(name=str(i), state_id=self.state.id,
+                            created_at=datetime(2017, 9, 28, 21, 5,
+                                                i).isoformat())
+                       for i in range(5)]
+        models.storage.bulk_new([self.state] + self.cities)
+        self.url = "/api/v1/states/{}/cities".format(self.state.id)
+
+    def tearDown(self):
+        """Removes the stored objects"""
+        models.storage.close()
+        for cls, obj in [(City, city) for city in self.cities] + \
+                [(State, self.state)]:
+            obj = models.storage.get(cls, obj.id)
+            if obj is not None:
+                obj.delete()
+        models.storage.save()
+
+    def test_pep8_conformance_pagination(self):
+        """Test that api/v1/views/pagination.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/pagination.py',
+                                    'tests/test_api/test_pagination.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_cursor_round_trip(self):
+        """Test that a cursor decodes to the (created_at, id) it encodes"""
+        city = self.cities[2]
+        self.assertEqual(decode_cursor(encode_cursor(city)),
+                         (city.created_at, city.id))
+
+    def test_pages(self):
+        """Test that the Link headers walk every object once, in order,
+        and that the last page has none"""
+        ids = []
+        url = self.url + "?limit=2"
+        pages = 0
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(city["id"] for city in response.get_json())
+            pages += 1
+            link = response.headers.get("Link")
+            url = None if link is None else \
+                link[1:link.index(">")].replace("http://localhost", "")
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids, [city.id for city in self.cities])
+        response = self.client.get(self.url + "?limit=5")
+        self.assertEqual(len(response.get_json()), 5)
+        self.assertNotIn("Link", response.headers)
+
+    def test_invalid(self):
+        """Test that malformed limits and cursors get a 400 answer"""
+        aware = base64.urlsafe_b64encode(json.dumps(
+            ["2017-09-28T21:05:54+02:00", "x"]).encode()).decode()
+        for query in ("limit=0", "limit=-1", "limit=two", "limit=²",
+                      "cursor=%25", "cursor=" + aware):
+            with self.subTest(query=query):
+                response = self.client.get(self.url + "?" + query)
+                self.assertEqual(response.status_code, 400)
+        with app.test_request_context(), self.assertRaises(BadRequest):
+            decode_cursor(aware)
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+"""
+Contains the TestStreaming class
+"""
+
+from api.v1.app import app
+from api.v1.views.streaming import CHUNK_SIZE, stream_texts
+import json
+import models
+from models.city import City
+from models.engine import snapshot
+from models.place import Place
+from models.state import State
+from models.user import User
+import pep8
+import unittest
+from unittest import mock
+
+
+class TestStreaming(unittest.TestCase):
+    """Test the streamed JSON arrays and the snapshots behind them"""
+    def setUp(self):
+        """Stores three places in a city"""
+        self.client = app.test_client()
+        self.user = User(email="stream@hbnb.io", password="pwd")
+        self.state = State(name="Streamed")
+        self.city = City(name="Streamed", state_id=self.state.id)
+        self.places = [Place(name=str(i), city_id=self.city.id,
+                             user_id=self.user.id) for i in range(3)]
+        models.storage.bulk_new([self.user, self.state, self.city] +
+                                self.places)
+
+    def tearDown(self):
+        """Removes the stored objects"""
+        models.storage.close()
+        for cls, obj in [(Place, place) for place in self.places] + \
+                [(City, self.city), (State, self.state), (User, self.user)]:
+            obj = models.storage.get(cls, obj.id)
+            if obj is not None:
+                obj.delete()
+        models.storage.save()
+
+    def test_pep8_conformance_streaming(self):
+        """Test that api/v1/views/streaming.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/streaming.py',
+                                    'tests/test_api/test_streaming.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def chunks(self, texts):
+        """Returns the chunks of stream_texts(texts), as strings"""
+        with app.test_request_context():
+            return list(stream_texts(texts).response)
+
+    def test_empty(self):
+        """Test that nothing to stream gives an empty array"""
+        self.assertEqual(self.chunks(iter(())), ["[]"])
+
+    def test_chunks(self):
+        """Test that a long array is sent in several chunks that join
+        into valid JSON"""
+        texts = [json.dumps({"name": "x" * 100, "i": i})
+                 for i in range(2 * CHUNK_SIZE // 100)]
+        chunks = self.chunks(iter(texts))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) < CHUNK_SIZE + 200
+                            for chunk in chunks))
+        self.assertEqual(json.loads("".join(chunks)),
+                         [json.loads(text) for text in texts])
+
+    def spy_snapshots(self):
+        """Returns a patch of storage.snapshot and the list the snapshots
+        it hands out are added to"""
+        taken = []
+        take = models.storage.snapshot
+
+        def spy(cls=None):
+            """Takes a snapshot counting its closings and the number of ids
+            each get_all() call asks for"""
+            taken.append(take(cls))
+            shot = taken[-1]
+            close = shot.close
+            get_all = shot.get_all
+            shot.closed = 0
+            shot.pages = []
+
+            def counted():
+                """Closes the snapshot once more"""
+                shot.closed += 1
+                close()
+
+            def paged(cls, ids):
+                """Reads the Records of ids"""
+                shot.pages.append(len(ids))
+                return get_all(cls, ids)
+            shot.close = counted
+            shot.get_all = paged
+            return shot
+        return mock.patch.object(models.storage, "snapshot", spy), taken
+
+    def test_close_collection(self):
+        """Test that a streamed collection closes its snapshot once the
+        response is closed"""
+        patch, taken = self.spy_snapshots()
+        with patch:
+            response = self.client.get("/api/v1/cities/{}/places".format(
+                self.city.id))
+            self.assertEqual(len(taken), 1)
+            self.assertEqual({place["id"] for place in response.get_json()},
+                             {place.id for place in self.places})
+            response.close()
+        self.assertGreaterEqual(taken[0].closed, 1)
+        if models.storage_t == "db":
+            self.assertTrue(taken[0]._DBSnapshot__connection.closed)
+
+    def test_close_search(self):
+        """Test that places_search streams its places a page at a time
+        and closes its snapshot once the response is closed"""
+        patch, taken = self.spy_snapshots()
+        with patch, mock.patch.object(snapshot, "PAGE_SIZE", 2):
+            response = self.client.post("/api/v1/places_search",
+                                        json={"cities": [self.city.id]})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual({place["id"] for place in response.get_json()},
+                             {place.id for place in self.places})
+            response.close()
+        self.assertEqual(len(taken), 1)
+        self.assertEqual(taken[0].pages, [2, 1])
+        self.assertGreaterEqual(taken[0].closed, 1)
+        if models.storage_t == "db":
+            self.assertTrue(taken[0]._DBSnapshot__connection.closed)
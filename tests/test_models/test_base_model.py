@@ -2,6 +2,7 @@
 """Test BaseModel for expected behavior and documentation"""
 from datetime import datetime
 import inspect
+import json
 import models
 import pep8 as pycodestyle
 import time
@@ -138,6 +139,18 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(new_d["created_at"], bm.created_at.strftime(t_format))
         self.assertEqual(new_d["updated_at"], bm.updated_at.strftime(t_format))
 
+    def test_to_json(self):
+        """test that to_json matches to_dict and follows attribute changes"""
+        inst = BaseModel()
+        inst.name = "Holberton"
+        self.assertEqual(json.loads(inst.to_json()), inst.to_dict())
+        inst.to_dict()["name"] = "changed"
+        self.assertEqual(inst.to_dict()["name"], "Holberton")
+        inst.name = "School"
+        self.assertEqual(json.loads(inst.to_json())["name"], "School")
+        del inst.name
+        self.assertNotIn("name", json.loads(inst.to_json()))
+
     def test_str(self):
         """test that the str method has the correct output"""
         inst = BaseModel()
@@ -17,7 +17,9 @@ from models.user import User
 import json
 import os
 import pep8
+from sqlalchemy import event
 import unittest
+from unittest import mock
 DBStorage = db_storage.DBStorage
 classes = {"Amenity": Amenity, "City": City, "Place": Place,
            "Review": Review, "State": State, "User": User}
@@ -98,3 +100,196 @@ class TestFileStorage(unittest.TestCase):
     def test_count(self):
         """Test that count properly counts all objects"""
         self.assertEqual(len(models.storage.all()), models.storage.count())
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_get_accepts_class(self):
+        """Test that get takes a class or a class name and a primary key"""
+        state = State(name="California")
+        state.save()
+        self.assertIs(models.storage.get(State, state.id), state)
+        self.assertIs(models.storage.get("State", state.id), state)
+        self.assertIsNone(models.storage.get(State, "missing"))
+        self.assertIsNone(models.storage.get("Nope", state.id))
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_count_by_class(self):
+        """Test that count takes a class or a class name"""
+        count = models.storage.count(State)
+        self.assertEqual(count, len(models.storage.all(State)))
+        self.assertEqual(models.storage.count("State"), count)
+        State(name="Nevada").save()
+        self.assertEqual(models.storage.count(State), count + 1)
+        self.assertEqual(models.storage.count("Nope"), 0)
+
+    def test_engine_options(self):
+        """Test that the pool settings are read from the environment"""
+        env = {"HBNB_DB_POOL_SIZE": "7", "HBNB_DB_POOL_OVERFLOW": "3",
+               "HBNB_DB_POOL_TIMEOUT": "2.5", "HBNB_DB_POOL_RECYCLE": "60",
+               "HBNB_DB_POOL_PRE_PING": "0"}
+        with mock.patch.dict(os.environ, env):
+            options = db_storage.engine_options("mysql+mysqldb://u:p@h/db")
+            memory = db_storage.engine_options("sqlite://")
+        self.assertEqual(options["pool_size"], 7)
+        self.assertEqual(options["max_overflow"], 3)
+        self.assertEqual(options["pool_timeout"], 2.5)
+        self.assertEqual(options["pool_recycle"], 60)
+        self.assertFalse(options["pool_pre_ping"])
+        self.assertIs(options["poolclass"], db_storage.MeteredQueuePool)
+        self.assertNotIn("pool_size", memory)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_pool_stats(self):
+        """Test that the pool counters follow the checkouts"""
+        before = models.storage.pool_stats()
+        with models.storage.snapshot() as snapshot:
+            snapshot.count(State)
+        after = models.storage.pool_stats()
+        self.assertGreater(after["checkouts"], before["checkouts"])
+        self.assertGreater(after["checkins"], before["checkins"])
+        self.assertGreaterEqual(after["wait_max"], after["wait_mean"])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_eager_loading(self):
+        """Test that loading relationships along takes a fixed number of
+        queries whatever the number of objects"""
+        storage = models.storage
+        engine = storage._DBStorage__engine
+        queries = []
+
+        def count(*args):
+            """Records one query"""
+            queries.append(args[2])
+        user = User(email="eager@hbnb.io", password="pwd")
+        user.save()
+        amenity = Amenity(name="Eager")
+        amenity.save()
+        counts = []
+        for size in (2, 6):
+            states = [State(name="Eager") for i in range(size)]
+            for state in states:
+                state.save()
+                for i in range(2):
+                    city = City(name="Eager", state_id=state.id)
+                    city.save()
+                    place = Place(name="Eager", city_id=city.id,
+                                  user_id=user.id)
+                    place.amenities.append(amenity)
+                    place.save()
+            storage.close()
+            event.listen(engine, "before_cursor_execute", count)
+            try:
+                del queries[:]
+                for state in storage.all(State, load=["cities.places"],
+                                         name="Eager").values():
+                    for city in state.cities:
+                        city.places
+                storage.search_places(states=[state.id for state in states],
+                                      amenities=[amenity.id])
+                storage.get(Place, place.id, load=["amenities"]).amenities
+                counts.append(len(queries))
+            finally:
+                event.remove(engine, "before_cursor_execute", count)
+        self.assertEqual(counts[0], counts[1])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_bulk(self):
+        """Test that bulk_new and bulk_update commit all objects at once"""
+        storage = models.storage
+        count = storage.count(Amenity)
+        amenities = storage.bulk_new(Amenity(name=str(i)) for i in range(5))
+        self.assertEqual(storage.count(Amenity), count + 5)
+        updated = storage.bulk_update(Amenity, [(amenities[0].id,
+                                                 {"name": "Bulk"}),
+                                                ("missing", {"name": "X"})])
+        self.assertEqual(updated, [amenities[0]])
+        storage.close()
+        self.assertEqual(storage.get(Amenity, amenities[0].id).name, "Bulk")
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_search_places(self):
+        """Test that search_places filters and pages places in one query"""
+        storage = models.storage
+        engine = storage._DBStorage__engine
+        queries = []
+
+        def count(*args):
+            """Records one query"""
+            queries.append(args[2])
+        storage.close()
+        user = User(email="search@hbnb.io", password="pwd")
+        state = State(name="Search")
+        city = City(name="Search", state_id=state.id)
+        wifi = Amenity(name="Wifi")
+        pool = Amenity(name="Pool")
+        places = [Place(name=str(i), city_id=city.id, user_id=user.id)
+                  for i in range(3)]
+        places[0].amenities.extend([wifi, pool])
+        places[1].amenities.append(wifi)
+        storage.bulk_new([user, state, city, wifi, pool] + places)
+        storage.close()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            found = storage.search_places(states=[state.id],
+                                          amenities=[wifi.id, "missing"])
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual({place.id for place in found},
+                         {places[0].id, places[1].id})
+        found = storage.search_places(cities=[city.id],
+                                      amenities=[wifi.id, pool.id])
+        self.assertEqual([place.id for place in found], [places[0].id])
+        self.assertEqual(len(storage.search_places(
+            cities=[city.id], amenities=["missing"])), 3)
+        first = storage.search_places(cities=[city.id], limit=2)
+        rest = storage.search_places(cities=[city.id], limit=2,
+                                     after=(first[-1].created_at,
+                                            first[-1].id))
+        self.assertEqual(len(first), 2)
+        self.assertEqual({place.id for place in first + rest},
+                         {place.id for place in places})
+        with storage.snapshot(Place) as snapshot:
+            self.assertEqual(snapshot.search_places(
+                cities=[city.id], amenities=[wifi.id, pool.id]),
+                [places[0].id])
+            self.assertEqual(snapshot.search_places(cities=[city.id],
+                                                    limit=2),
+                             [place.id for place in first])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_stamp(self):
+        """Test that class stamps follow the rows written by other
+        connections"""
+        storage = models.storage
+        engine = storage._DBStorage__engine
+        table = State.__table__
+        storage.close()
+        version, last_modified = storage.stamp(State)
+        later = datetime(2030, 1, 1)
+        with engine.begin() as connection:
+            connection.execute(table.insert().values(
+                id="stamp", name="Stamp", created_at=later, updated_at=later))
+        storage.close()
+        inserted = storage.stamp("State")
+        self.assertNotEqual(inserted[0], version)
+        self.assertEqual(inserted[1], later)
+        with engine.begin() as connection:
+            connection.execute(table.delete().where(table.c.id == "stamp"))
+        storage.close()
+        self.assertEqual(storage.stamp(State), (version, last_modified))
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_snapshot_stream(self):
+        """Test that a streamed snapshot yields the rows in order and gives
+        its connection back once they are all read"""
+        storage = models.storage
+        storage.close()
+        states = storage.bulk_new(State(name="Stream") for i in range(3))
+        states.sort(key=lambda state: (state.created_at, state.id))
+        records = storage.snapshot().stream(State, name="Stream")
+        first = next(records)
+        checked_out = storage.pool_stats()["checked_out"]
+        ids = [first.id] + [record.id for record in records]
+        self.assertEqual(ids, [state.id for state in states])
+        self.assertEqual(storage.pool_stats()["checked_out"],
+                         checked_out - 1)
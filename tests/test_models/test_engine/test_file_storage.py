@@ -5,6 +5,7 @@ Contains the TestFileStorageDocs classes
 
 from datetime import datetime
 import inspect
+import io
 import models
 from models.engine import file_storage
 from models.amenity import Amenity
@@ -15,9 +16,12 @@ from models.review import Review
 from models.state import State
 from models.user import User
 import json
+import multiprocessing
 import os
 import pep8
+import threading
 import unittest
+from unittest import mock
 FileStorage = file_storage.FileStorage
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
@@ -72,11 +76,12 @@ class TestFileStorage(unittest.TestCase):
     """Test the FileStorage class"""
     @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
     def test_all_returns_dict(self):
-        """Test that all returns the FileStorage.__objects attr"""
+        """Test that all returns a copy of the FileStorage.__objects attr"""
         storage = FileStorage()
         new_dict = storage.all()
         self.assertEqual(type(new_dict), dict)
-        self.assertIs(new_dict, storage._FileStorage__objects)
+        self.assertEqual(new_dict, storage._FileStorage__objects)
+        self.assertIsNot(new_dict, storage._FileStorage__objects)
 
     @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
     def test_new(self):
@@ -137,3 +142,535 @@ class TestFileStorage(unittest.TestCase):
         new_state.save()
         self.assertEqual(storage.count(), initial_length + 1)
         self.assertEqual(storage.count("State"), state_len + 1)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_related(self):
+        """Test that related follows the secondary foreign-key indexes"""
+        storage = FileStorage()
+        state = State()
+        city = City(state_id=state.id)
+        storage.new(state)
+        storage.new(city)
+        self.assertEqual(storage.related(City, "state_id", state.id), [city])
+        self.assertEqual(state.cities, [city])
+        city.state_id = "moved"
+        self.assertEqual(storage.related("City", "state_id", state.id), [])
+        self.assertEqual(storage.related("City", "state_id", "moved"),
+                         [city])
+        storage.delete(city)
+        self.assertEqual(storage.related("City", "state_id", "moved"), [])
+        place = Place(city_id=city.id)
+        storage.new(place)
+        self.assertEqual(city.places, [place])
+        storage.delete(place)
+        storage.delete(state)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_count_by_class(self):
+        """Test that all and count accept class objects and class names"""
+        storage = FileStorage()
+        amenity = Amenity()
+        storage.new(amenity)
+        key = "Amenity." + amenity.id
+        self.assertIs(storage.all(Amenity)[key], amenity)
+        self.assertIs(storage.all("Amenity")[key], amenity)
+        self.assertNotIn(key, storage.all(State))
+        self.assertEqual(storage.count(Amenity), len(storage.all(Amenity)))
+        self.assertEqual(storage.count("Amenity"), storage.count(Amenity))
+        storage.delete(amenity)
+        self.assertNotIn(key, storage.all(Amenity))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_journal(self):
+        """Test that journal mode appends deltas and replays them"""
+        storage = FileStorage()
+        journal = "file.json.journal"
+        saved = FileStorage._FileStorage__journal
+        FileStorage._FileStorage__journal = True
+        try:
+            storage.compact()
+            with open(journal, "r") as f:
+                header = json.loads(f.read())
+            stat = os.stat("file.json")
+            self.assertEqual(header["base"], [stat.st_size, stat.st_mtime_ns])
+            state = State(name="Journal")
+            storage.new(state)
+            storage.save()
+            with open(journal, "r") as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual(len(lines), 2)
+            self.assertEqual(lines[1]["key"], "State." + state.id)
+            self.assertEqual(lines[1]["value"]["name"], "Journal")
+            with open("file.json", "r") as f:
+                self.assertNotIn("State." + state.id, json.load(f))
+            storage.delete(state)
+            storage.save()
+            state.name = "Replayed"
+            storage.new(state)
+            storage.save()
+            FileStorage._FileStorage__objects.clear()
+            FileStorage._FileStorage__classes.clear()
+            storage.reload()
+            self.assertEqual(storage.get(State, state.id).name, "Replayed")
+            storage.delete(storage.get(State, state.id))
+            storage.save()
+            storage.compact()
+            with open(journal, "r") as f:
+                self.assertEqual(len(f.readlines()), 1)
+            storage.reload()
+            self.assertIsNone(storage.get(State, state.id))
+        finally:
+            FileStorage._FileStorage__journal = saved
+            os.remove(journal)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_loaded_text(self):
+        """Test that reloaded objects keep the text read from the JSON file
+        and the journal as their JSON text"""
+        storage = FileStorage()
+        journal = "file.json.journal"
+        saved = FileStorage._FileStorage__journal
+        FileStorage._FileStorage__journal = True
+        try:
+            filed = State(name="Filed")
+            storage.new(filed)
+            storage.compact()
+            journaled = State(name="Journaled")
+            storage.new(journaled)
+            storage.save()
+            FileStorage._FileStorage__objects.clear()
+            FileStorage._FileStorage__classes.clear()
+            storage.reload()
+            with open("file.json", "r") as f:
+                texts = {key: text
+                         for key, value, text in file_storage.iter_members(f)}
+            with open(journal, "r") as f:
+                entry = f.readlines()[-1]
+            for state, text in ((filed, texts["State." + filed.id]),
+                                (journaled, entry[entry.index('"value": ') +
+                                                  9:-2])):
+                loaded = storage.get(State, state.id)
+                self.assertIsNot(loaded, state)
+                self.assertEqual(loaded._BaseModel__text, text)
+                self.assertEqual(loaded.to_json(dump="Yes"), text)
+                loaded.name = "Changed"
+                self.assertEqual(json.loads(loaded.to_json(dump="Yes"))
+                                 ["name"], "Changed")
+                storage.delete(loaded)
+            storage.compact()
+        finally:
+            FileStorage._FileStorage__journal = saved
+            os.remove(journal)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_stale_journal(self):
+        """Test that a journal already folded into the file is ignored"""
+        storage = FileStorage()
+        journal = "file.json.journal"
+        saved = FileStorage._FileStorage__journal
+        FileStorage._FileStorage__journal = True
+        try:
+            storage.compact()
+            state = State(name="Stale")
+            storage.new(state)
+            storage.save()
+            with open(journal, "r") as f:
+                stale = f.read()
+            state.name = "Folded"
+            storage.compact()
+            with open(journal, "w") as f:
+                f.write(stale)
+            storage.reload()
+            self.assertEqual(storage.get(State, state.id).name, "Folded")
+            with open(journal, "r") as f:
+                self.assertEqual(len(f.readlines()), 1)
+            storage.delete(state)
+            storage.compact()
+        finally:
+            FileStorage._FileStorage__journal = saved
+            os.remove(journal)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_batch(self):
+        """Test that saves inside a batch are written when it ends"""
+        storage = FileStorage()
+        saved = FileStorage._FileStorage__fsync
+        FileStorage._FileStorage__fsync = "batched"
+        state = State(name="Batched")
+        key = "State." + state.id
+        try:
+            storage.compact()
+            storage.begin_batch()
+            try:
+                storage.new(state)
+                storage.save()
+                storage.begin_batch()
+                try:
+                    storage.save()
+                finally:
+                    storage.end_batch()
+                with open("file.json", "r") as f:
+                    self.assertNotIn(key, json.load(f))
+            finally:
+                storage.end_batch()
+            with open("file.json", "r") as f:
+                self.assertIn(key, json.load(f))
+        finally:
+            FileStorage._FileStorage__fsync = saved
+        storage.delete(state)
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_compact_keeps_mode(self):
+        """Test that rewriting the JSON file keeps its permissions"""
+        storage = FileStorage()
+        storage.compact()
+        mode = os.stat("file.json").st_mode & 0o777
+        try:
+            os.chmod("file.json", 0o640)
+            storage.compact()
+            self.assertEqual(os.stat("file.json").st_mode & 0o777, 0o640)
+        finally:
+            os.chmod("file.json", mode)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_group_commit(self):
+        """Test that concurrent saves all return with their data written"""
+        storage = FileStorage()
+        states = [State(name=str(i)) for i in range(16)]
+        errors = []
+
+        def write(state):
+            """Saves one state and checks it reached the file"""
+            storage.new(state)
+            storage.save()
+            with open("file.json", "r") as f:
+                if "State." + state.id not in json.load(f):
+                    errors.append(state)
+        threads = [threading.Thread(target=write, args=(state,))
+                   for state in states]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        for state in states:
+            storage.delete(state)
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_pending_changes(self):
+        """Test that new, attribute writes and delete are tracked"""
+        storage = FileStorage()
+        storage.save()
+        self.assertEqual(storage.pending_changes(),
+                         {"new": [], "dirty": [], "deleted": []})
+        user = User()
+        self.assertFalse(user.is_dirty)
+        storage.new(user)
+        self.assertEqual(storage.pending_changes()["new"], [user])
+        storage.save()
+        self.assertFalse(user.is_dirty)
+        user.first_name = "Betty"
+        self.assertTrue(user.is_dirty)
+        self.assertEqual(storage.pending_changes()["dirty"], [user])
+        storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)["User." + user.id]
+        self.assertEqual(saved["first_name"], "Betty")
+        storage.delete(user)
+        self.assertEqual(storage.pending_changes()["deleted"], [user])
+        storage.save()
+        self.assertEqual(storage.pending_changes()["deleted"], [])
+        transient = User()
+        storage.new(transient)
+        storage.delete(transient)
+        self.assertEqual(storage.pending_changes(),
+                         {"new": [], "dirty": [], "deleted": []})
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_paged(self):
+        """Test that all pages objects in (created_at, id) order"""
+        storage = FileStorage()
+        state = State()
+        cities = [City(state_id=state.id) for i in range(5)]
+        for city in cities:
+            storage.new(city)
+        cities.sort(key=lambda city: (city.created_at, city.id))
+        page = list(storage.all(City, limit=2, state_id=state.id).values())
+        self.assertEqual(page, cities[:2])
+        after = (page[-1].created_at, page[-1].id)
+        page = list(storage.all(City, limit=2, after=after,
+                                state_id=state.id).values())
+        self.assertEqual(page, cities[2:4])
+        everything = list(storage.all(City, after=after).values())
+        self.assertEqual(everything[-3:], cities[2:])
+        for city in cities:
+            storage.delete(city)
+        self.assertEqual(storage.all(City, limit=10, state_id=state.id), {})
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_version(self):
+        """Test that class versions move on changes and not on reloads"""
+        storage = FileStorage()
+        version = storage.version(Amenity)
+        amenity = Amenity()
+        storage.new(amenity)
+        self.assertEqual(storage.version("Amenity"), version + 1)
+        self.assertGreaterEqual(storage.last_modified(Amenity),
+                                amenity.created_at)
+        amenity.name = "Wifi"
+        self.assertEqual(storage.version(Amenity), version + 2)
+        storage.save()
+        storage.reload()
+        self.assertEqual(storage.version(Amenity), version + 2)
+        storage.delete(amenity)
+        self.assertEqual(storage.version(Amenity), version + 3)
+        storage.save()
+
+    def test_iter_members(self):
+        """Test that iter_members decodes what json.load accepts, null
+        values and members split across reads included"""
+        text = '{"a": null, "b": {"c": [1, null]}, "d": 12, "e": "x"}'
+        for size in (1, 3, 1 << 16):
+            members = list(file_storage.iter_members(io.StringIO(text),
+                                                     size))
+            self.assertEqual({key: value for key, value, raw in members},
+                             json.loads(text))
+            self.assertEqual(members[1][2], '{"c": [1, null]}')
+        with self.assertRaises(ValueError):
+            list(file_storage.iter_members(io.StringIO('{"a": null'), 4))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_deferred_class(self):
+        """Test that deferred classes are loaded on first access only"""
+        storage = FileStorage()
+        amenity = Amenity(name="Deferred")
+        storage.new(amenity)
+        storage.save()
+        key = "Amenity." + amenity.id
+        deferred = FileStorage._FileStorage__deferred
+        deferred.add("Amenity")
+        try:
+            storage._FileStorage__remove(key)
+            storage.reload()
+            self.assertNotIn(key, FileStorage._FileStorage__objects)
+            loaded = storage.get(Amenity, amenity.id)
+            self.assertEqual(loaded.name, "Deferred")
+            self.assertNotIn("Amenity", deferred)
+        finally:
+            deferred.discard("Amenity")
+        storage.delete(loaded)
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_refresh(self):
+        """Test that close only reads the file again once it changed"""
+        storage = FileStorage()
+        state = State(name="Before")
+        storage.new(state)
+        storage.save()
+        version = storage.version(State)
+        storage.close()
+        self.assertEqual(storage.version(State), version)
+        key = "State." + state.id
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        saved[key]["name"] = "After"
+        with open("file.json", "w") as f:
+            json.dump(saved, f)
+        storage.close()
+        self.assertEqual(storage.get(State, state.id).name, "After")
+        del saved[key]
+        with open("file.json", "w") as f:
+            json.dump(saved, f)
+        storage.close()
+        self.assertIsNone(storage.get(State, state.id))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_concurrent_access(self):
+        """Test mixed reads and writes from several threads at once"""
+        storage = FileStorage()
+        errors = []
+        stop = threading.Event()
+
+        def write(index):
+            """Creates, changes, saves and deletes states in a loop"""
+            try:
+                while not stop.is_set():
+                    state = State(name=str(index))
+                    storage.new(state)
+                    state.name = "changed"
+                    storage.save()
+                    storage.delete(state)
+                    storage.save()
+            except Exception as error:
+                errors.append(error)
+
+        def read():
+            """Lists, counts and looks up states in a loop"""
+            try:
+                while not stop.is_set():
+                    for key, obj in storage.all(State).items():
+                        storage.get(State, obj.id)
+                    list(storage.snapshot(State).stream(State))
+                    storage.count(State)
+                    storage.all()
+            except Exception as error:
+                errors.append(error)
+        threads = [threading.Thread(target=write, args=(i,))
+                   for i in range(4)]
+        threads += [threading.Thread(target=read) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        stop.wait(1)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(storage.count(), len(storage.all()))
+        self.assertEqual(storage.pending_changes(),
+                         {"new": [], "dirty": [], "deleted": []})
+        with open("file.json", "r") as f:
+            self.assertEqual(set(json.load(f)), set(storage.all()))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_snapshot(self):
+        """Test that snapshot Records keep the objects as they were read
+        and that a page only serializes its own objects"""
+        storage = FileStorage()
+        states = [State(name="Snapshot",
+                        created_at=datetime(2017, 9, 28, 21, 5, i).isoformat())
+                  for i in range(3)]
+        storage.bulk_new(states)
+        with storage.snapshot(State) as snapshot:
+            record = snapshot.get(State, states[0].id)
+            states[0].name = "After"
+            self.assertEqual(json.loads(record.text)["name"], "Snapshot")
+            self.assertIsNone(snapshot.get(State, "missing"))
+            self.assertEqual(snapshot.count(State), storage.count(State))
+            page = snapshot.records(State, limit=2, name="Snapshot")
+            self.assertEqual([r.id for r in page],
+                             [state.id for state in states[1:]])
+            first = snapshot.records(State, limit=1)[0]
+            self.assertEqual(snapshot.records(State, limit=1,
+                                              after=first[:2])[0].id,
+                             snapshot.records(State, limit=2)[1].id)
+        for state in states:
+            state.name = "Reset"
+        snapshot = storage.snapshot(State)
+        snapshot.get_all(State, [states[1].id])
+        self.assertEqual([getattr(state, "_BaseModel__text", None) is None
+                          for state in states], [True, False, True])
+        records = list(snapshot.stream(State, name="Reset"))
+        self.assertEqual([r.id for r in records],
+                         [state.id for state in states])
+        for state in states:
+            storage.delete(state)
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_snapshot_copies(self):
+        """Test that a snapshot keeps the objects stored when it was taken,
+        shares its copies while the class is unchanged and streams in
+        pages"""
+        storage = FileStorage()
+        states = [State(name="Copied",
+                        created_at=datetime(2017, 9, 28, 21, 6, i).isoformat())
+                  for i in range(5)]
+        storage.bulk_new(states[:4])
+        city = City(name="Copied", state_id=states[0].id)
+        place = Place(name="Copied", city_id=city.id, user_id="0")
+        storage.bulk_new([city, place])
+        count = storage.count(State)
+        snapshot = storage.snapshot(State)
+        with storage.snapshot(State) as other:
+            self.assertIs(other._FileSnapshot__copies["State"][1],
+                          snapshot._FileSnapshot__copies["State"][1])
+        storage.new(states[4])
+        storage.delete(states[0])
+        with snapshot:
+            self.assertEqual(snapshot.count(State), count)
+            self.assertEqual([r.id for r in snapshot.records(State,
+                                                             name="Copied")],
+                             [state.id for state in states[:4]])
+            self.assertEqual(snapshot.search_places(cities=[city.id]),
+                             [place.id])
+            self.assertEqual(snapshot.count(State), count)
+        with storage.snapshot(Place) as snapshot:
+            storage.new(Place(name="Later", city_id=city.id, user_id="0"))
+            self.assertEqual(snapshot.search_places(cities=[city.id]),
+                             [place.id])
+        for state in states:
+            state.name = "Paged"
+        with mock.patch.object(file_storage, "PAGE_SIZE", 2):
+            stream = storage.snapshot(State).stream(State, name="Paged")
+            self.assertEqual(next(stream).id, states[1].id)
+            self.assertEqual([getattr(state, "_BaseModel__text", None)
+                              is None for state in states[1:]],
+                             [False, False, True, True])
+            self.assertEqual([r.id for r in stream],
+                             [state.id for state in states[2:]])
+        for obj in storage.all(Place, city_id=city.id).values():
+            storage.delete(obj)
+        for obj in states[1:] + [city]:
+            storage.delete(obj)
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_shared_processes(self):
+        """Test that processes sharing the files see each other's saves"""
+        storage = FileStorage()
+        saved = (FileStorage._FileStorage__shared,
+                 FileStorage._FileStorage__journal)
+        FileStorage._FileStorage__shared = True
+        FileStorage._FileStorage__journal = True
+
+        def write(name):
+            """Creates and saves states one at a time"""
+            for i in range(20):
+                storage.new(State(name=name))
+                storage.save()
+        try:
+            storage.compact()
+            context = multiprocessing.get_context("fork")
+            processes = [context.Process(target=write,
+                                         args=("Shared{}".format(i),))
+                         for i in range(3)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            storage.refresh()
+            states = [state for state in storage.all(State).values()
+                      if getattr(state, "name", "").startswith("Shared")]
+            names = [state.name for state in states]
+            self.assertEqual([names.count("Shared{}".format(i))
+                              for i in range(3)], [20, 20, 20])
+            for state in states:
+                storage.delete(state)
+            storage.compact()
+        finally:
+            (FileStorage._FileStorage__shared,
+             FileStorage._FileStorage__journal) = saved
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_bulk(self):
+        """Test that bulk_new and bulk_update save all objects at once"""
+        storage = FileStorage()
+        states = storage.bulk_new(State(name=str(i)) for i in range(5))
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        for state in states:
+            self.assertIn("State." + state.id, saved)
+        updated = storage.bulk_update("State", [(states[0].id,
+                                                 {"name": "Bulk"}),
+                                                ("missing", {"name": "X"})])
+        self.assertEqual(updated, [states[0]])
+        self.assertEqual(storage.pending_changes()["dirty"], [])
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual(saved["State." + states[0].id]["name"], "Bulk")
+        for state in states:
+            storage.delete(state)
+        storage.save()
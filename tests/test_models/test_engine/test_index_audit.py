@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""
+Contains the TestIndexAudit class
+"""
+
+import models
+from models.base_model import Base
+from models.engine import index_audit
+import pep8
+from sqlalchemy import create_engine
+import unittest
+
+
+class TestIndexAudit(unittest.TestCase):
+    """Test the index audit against an in-memory SQLite database"""
+    def test_pep8_conformance_index_audit(self):
+        """Test that models/engine/index_audit.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/index_audit.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_index_audit.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_function_docstrings(self):
+        """Test for the presence of docstrings in the functions"""
+        for name in ("live_indexes", "covered", "missing_indexes",
+                     "access_paths", "explain", "slow_paths", "audit"):
+            self.assertTrue(getattr(index_audit, name).__doc__,
+                            "{} needs a docstring".format(name))
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_audit(self):
+        """Test that a dropped index is reported along with the table scan
+        it causes, and that the declared schema is found complete"""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX ix_cities_state_id")
+        findings = index_audit.audit(engine, Base.metadata)
+        self.assertEqual(len(findings), 2)
+        self.assertEqual(findings[0], index_audit.Finding(
+            "cities", "missing index ix_cities_state_id (state_id)",
+            "CREATE INDEX ix_cities_state_id ON cities (state_id)"))
+        self.assertEqual(findings[1].table, "cities")
+        self.assertIn("cities.state_id", findings[1].problem)
+        with engine.begin() as connection:
+            connection.exec_driver_sql(findings[0].detail)
+        self.assertEqual(index_audit.missing_indexes(engine, Base.metadata),
+                         [])
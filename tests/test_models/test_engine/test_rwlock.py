@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""
+Contains the TestReadWriteLock class
+"""
+
+from models.engine.rwlock import ReadWriteLock
+import pep8
+import threading
+import unittest
+
+
+class TestReadWriteLock(unittest.TestCase):
+    """Test the ReadWriteLock class"""
+    def test_pep8_conformance_rwlock(self):
+        """Test that models/engine/rwlock.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/rwlock.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_rwlock.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_readers_share(self):
+        """Test that a reader does not wait for another reader"""
+        lock = ReadWriteLock()
+        entered = threading.Event()
+
+        def read():
+            """Reads while the main thread holds a read"""
+            with lock.read():
+                entered.set()
+        with lock.read():
+            thread = threading.Thread(target=read)
+            thread.start()
+            self.assertTrue(entered.wait(5))
+        thread.join()
+
+    def test_writer_excludes(self):
+        """Test that a reader waits for the writer to be done"""
+        lock = ReadWriteLock()
+        entered = threading.Event()
+
+        def read():
+            """Reads once the main thread stops writing"""
+            with lock.read():
+                entered.set()
+        with lock.write():
+            thread = threading.Thread(target=read)
+            thread.start()
+            self.assertFalse(entered.wait(0.1))
+        self.assertTrue(entered.wait(5))
+        thread.join()
+
+    def test_reentrant(self):
+        """Test that the writer may write and read again"""
+        lock = ReadWriteLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    pass
+        with lock.read():
+            with lock.read():
+                self.assertRaises(RuntimeError, lock.acquire_write)
+        with lock.write():
+            pass
@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""
+Contains the TestPlaceSearchIndex class
+"""
+
+from models.amenity import Amenity
+from models.city import City
+from models.engine import search_index
+from models.place import Place
+from models.state import State
+import pep8
+import unittest
+PlaceSearchIndex = search_index.PlaceSearchIndex
+
+
+class TestPlaceSearchIndex(unittest.TestCase):
+    """Test the PlaceSearchIndex class"""
+    def setUp(self):
+        """Builds an index over two states, three cities and four places"""
+        self.index = PlaceSearchIndex()
+        self.ca, self.nv = State(), State()
+        self.sf = City(state_id=self.ca.id)
+        self.la = City(state_id=self.ca.id)
+        self.lv = City(state_id=self.nv.id)
+        self.wifi, self.pool = Amenity(), Amenity()
+        self.p1 = Place(city_id=self.sf.id,
+                        amenity_ids=[self.wifi.id, self.pool.id])
+        self.p2 = Place(city_id=self.sf.id, amenity_ids=[self.wifi.id])
+        self.p3 = Place(city_id=self.la.id)
+        self.p4 = Place(city_id=self.lv.id, amenity_ids=[self.pool.id])
+        for obj in (self.sf, self.la, self.lv,
+                    self.p1, self.p2, self.p3, self.p4):
+            self.index.add(obj)
+
+    def test_pep8_conformance_search_index(self):
+        """Test that models/engine/search_index.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/search_index.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_search_index.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_search(self):
+        """Test unions over states and cities and amenity intersections"""
+        search = self.index.search
+        self.assertCountEqual(search(), [self.p1, self.p2, self.p3, self.p4])
+        self.assertCountEqual(search(states=[self.ca.id]),
+                              [self.p1, self.p2, self.p3])
+        self.assertCountEqual(search(states=[self.nv.id],
+                                     cities=[self.la.id]),
+                              [self.p3, self.p4])
+        self.assertCountEqual(search(amenities=[self.pool.id]),
+                              [self.p1, self.p4])
+        self.assertEqual(search(cities=[self.sf.id],
+                                amenities=[self.wifi.id, self.pool.id]),
+                         [self.p1])
+        self.assertEqual(search(states=["unknown"]), [])
+
+    def test_incremental_updates(self):
+        """Test that the index follows moves, links and removals"""
+        self.p3.amenity_ids = [self.pool.id]
+        self.index.update(self.p3, "amenity_ids")
+        self.assertCountEqual(self.index.search(amenities=[self.pool.id]),
+                              [self.p1, self.p3, self.p4])
+        self.lv.state_id = self.ca.id
+        self.index.update(self.lv, "state_id")
+        self.assertCountEqual(self.index.search(states=[self.ca.id],
+                                                amenities=[self.pool.id]),
+                              [self.p1, self.p3, self.p4])
+        self.index.remove(self.p1)
+        self.p2.city_id = self.lv.id
+        self.index.update(self.p2, "city_id")
+        self.assertCountEqual(self.index.search(cities=[self.sf.id]), [])
+        self.assertCountEqual(self.index.search(cities=[self.lv.id]),
+                              [self.p2, self.p4])
+        p5 = Place(city_id=self.sf.id)
+        self.index.add(p5)
+        self.assertEqual(self.index.search(cities=[self.sf.id]), [p5])
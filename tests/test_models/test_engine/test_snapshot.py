@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""
+Contains the TestSnapshot class
+"""
+
+from datetime import datetime, timedelta
+from models.engine.snapshot import Record, Snapshot
+import pep8
+import unittest
+
+
+class ListSnapshot(Snapshot):
+    """Snapshot over a list of Records, counting how often it is closed"""
+    def __init__(self, records):
+        """Creates a snapshot over records"""
+        self.items = records
+        self.closed = 0
+
+    def close(self):
+        """Counts the closing"""
+        self.closed += 1
+
+    def records(self, cls, limit=None, after=None, **filters):
+        """Returns the Records as they are"""
+        return list(self.items)
+
+    def get_all(self, cls, ids):
+        """Returns the Records with the given ids, in the order of ids"""
+        by_id = {record.id: record for record in self.items}
+        return [by_id[id] for id in ids if id in by_id]
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test the Snapshot base class"""
+    def setUp(self):
+        """Creates a snapshot of three records"""
+        start = datetime(2017, 9, 28, 21, 5, 54)
+        self.records = [Record(start + timedelta(seconds=i), "c{}".format(i),
+                               '{{"name": "{}"}}'.format(i))
+                        for i in range(3)]
+        self.snapshot = ListSnapshot(self.records)
+
+    def test_pep8_conformance_snapshot(self):
+        """Test that models/engine/snapshot.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/snapshot.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_snapshot.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_get(self):
+        """Test that get() goes through get_all()"""
+        self.assertEqual(self.snapshot.get("City", "c1"), self.records[1])
+        self.assertIsNone(self.snapshot.get("City", "c9"))
+
+    def test_stream(self):
+        """Test that streaming closes the snapshot once read, or once the
+        generator is closed early"""
+        with self.snapshot as snapshot:
+            self.assertEqual(list(snapshot.stream("City")), self.records)
+            self.assertEqual(snapshot.closed, 1)
+        self.assertEqual(snapshot.closed, 2)
+        stream = ListSnapshot(self.records)
+        records = stream.stream("City")
+        next(records)
+        records.close()
+        self.assertEqual(stream.closed, 1)
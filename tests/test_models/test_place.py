@@ -198,3 +198,19 @@ class TestPlace(unittest.TestCase):
         place = Place()
         string = "[Place] ({}) {}".format(place.id, place.__dict__)
         self.assertEqual(string, str(place))
+
+    @unittest.skipIf(not models.base_model.compact, "compact models disabled")
+    def test_compact(self):
+        """test slotted places with defaults and overflow attributes"""
+        place = Place(name="Loft")
+        self.assertEqual(place.number_rooms, 0)
+        self.assertNotIn("number_rooms", place.__dict__)
+        place.number_rooms = 3
+        place.nickname = "Nest"
+        self.assertEqual(place.nickname, "Nest")
+        new_d = place.to_dict()
+        self.assertEqual(new_d["number_rooms"], 3)
+        self.assertEqual(new_d["nickname"], "Nest")
+        self.assertEqual(Place(**new_d).nickname, "Nest")
+        del place.nickname
+        self.assertFalse(hasattr(place, "nickname"))